@@ -1,6 +1,7 @@
 import asyncio
 from playwright.async_api import async_playwright
 import pandas as pd
+from swagger_spec_extractor import extract_endpoints_from_ui
 
 # ================= CONFIGURATION =================
 # Replace with your actual URL
@@ -18,7 +19,39 @@ PARAM_NAME_CSS = '.parameter__name'
 PARAM_ENUM_CSS = '.parameter__enum'
 # =================================================
 
+def save_report(all_endpoints_data):
+    # Pandas is smart! It will take our list of dictionaries (which might have different keys)
+    # and align them perfectly into columns. Keys present in one dict but missing in others
+    # will simply be blank cells.
+    df = pd.DataFrame(all_endpoints_data)
+
+    # Optional: Reorder columns to put Endpoint first if needed (Pandas usually does this, but to be safe)
+    cols = ['Endpoint'] + [c for c in df.columns if c != 'Endpoint']
+    df = df[cols]
+
+    df.to_excel(EXCEL_FILE, index=False)
+    print(f"\nSUCCESS: Report saved to {EXCEL_FILE} with dynamic columns!")
+
+def rows_from_spec(url):
+    """Same row shape as the browser scrape: Endpoint + one column per enum parameter."""
+    by_endpoint = {}
+    for row in extract_endpoints_from_ui(url):
+        current_row_data = by_endpoint.setdefault(row["endpoint"], {"Endpoint": row["endpoint"]})
+        for param_name, values in row.items():
+            if param_name not in ("tag", "method", "endpoint") and values:
+                current_row_data[param_name] = values
+    return list(by_endpoint.values())
+
 async def extract_swagger_data(url):
+    # --- 0. Parse the spec behind the UI directly (no browser) ---
+    try:
+        all_endpoints_data = await asyncio.to_thread(rows_from_spec, url)
+        print(f"Found {len(all_endpoints_data)} GET endpoints in spec.")
+        save_report(all_endpoints_data)
+        return
+    except Exception as e:
+        print(f"Spec parsing failed ({e}), falling back to Swagger UI scraping")
+
     async with async_playwright() as p:
         browser = await p.chromium.launch(headless=False)
         context = await browser.new_context()
@@ -116,17 +149,7 @@ async def extract_swagger_data(url):
         await browser.close()
 
         # --- 4. Save to Excel ---
-        # Pandas is smart! It will take our list of dictionaries (which might have different keys)
-        # and align them perfectly into columns. Keys present in one dict but missing in others 
-        # will simply be blank cells.
-        df = pd.DataFrame(all_endpoints_data)
-        
-        # Optional: Reorder columns to put Endpoint first if needed (Pandas usually does this, but to be safe)
-        cols = ['Endpoint'] + [c for c in df.columns if c != 'Endpoint']
-        df = df[cols]
-        
-        df.to_excel(EXCEL_FILE, index=False)
-        print(f"\nSUCCESS: Report saved to {EXCEL_FILE} with dynamic columns!")
+        save_report(all_endpoints_data)
 
 if __name__ == "__main__":
     asyncio.run(extract_swagger_data(SAMPLE_URL))
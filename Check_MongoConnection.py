@@ -6,7 +6,7 @@ from requests_ntlm import HttpNtlmAuth
 import xml.etree.ElementTree as ET
 from dotenv import load_dotenv
 from auth import get_password
-import subprocess
+from pl_http import shared_session, XML_HEADERS
 import urllib3
 
 urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
@@ -30,25 +30,13 @@ output_file = "shared/reports/ExtractBookReffromCDWurl_ValidateInDB_report.xlsx"
 # -------------------------------------------------------
 def fetch_cdw_response(cdwurl):
     try:
-        command = [
-            'curl', '-u', f'{USERNAME}:{PASSWORD}',
-            '-H', 'Accept: application/xml',
-            '-H', 'Content-Type:application/xml',
-            cdwurl
-        ]
-        result = subprocess.run(
-            command,
-            stdout=subprocess.PIPE,
-            stderr=subprocess.PIPE,
-            text=True,
-            timeout=60
-        )
-
-        if result.returncode == 0:
-            print("[DEBUG] curl output fetched successfully")
-            return result.stdout
+        resp = shared_session(USERNAME, PASSWORD, "basic", XML_HEADERS).get(cdwurl, timeout=60)
+
+        if resp.ok:
+            print("[DEBUG] CDW response fetched successfully")
+            return resp.text
         else:
-            print(f"[DEBUG] curl failed with return code {result.returncode}")
+            print(f"[DEBUG] CDW request failed with HTTP {resp.status_code}")
             return None
 
     except Exception as e:
@@ -2,6 +2,7 @@ import pandas as pd
 import json
 import os
 from Modules import config
+from pl_url_template import compile_template
 
 def load_json_defaults(json_path):
     """Loads default overrides (tradingEntity, reportingDate) from JSON."""
@@ -15,20 +16,49 @@ def load_json_defaults(json_path):
         return {}
 
 def load_exclusions(excel_path):
-    """Loads the blacklist: {'bdmDataType': ['BrokenType'], ...}"""
+    """Loads the blacklist, compiled for O(1) lookups: {'bdmDataType': frozenset({'BrokenType'}), ...}"""
     if not os.path.exists(excel_path):
         return {}
-    
+
     df = pd.read_excel(excel_path)
     exclusions = {}
-    for _, row in df.iterrows():
-        param = str(row['Parameter']).strip()
-        vals = [x.strip() for x in str(row['Values']).split(',') if x.strip()]
-        if param in exclusions:
-            exclusions[param].extend(vals)
+    for param, values in zip(df['Parameter'], df['Values']):
+        if pd.isna(param) or pd.isna(values):
+            continue
+        vals = [x.strip() for x in str(values).split(',') if x.strip()]
+        exclusions.setdefault(str(param).strip(), set()).update(vals)
+    return {param: frozenset(vals) for param, vals in exclusions.items()}
+
+def plan_columns(df_manual, defaults, exclusions):
+    """
+    Column-wise view of the manual plan. For each parameter column:
+      - value:    the value used per row (JSON default if one exists - Rule #1 -
+                  else the stripped cell), None where the cell is empty
+      - excluded: rows whose value is blacklisted for that parameter (Rule #2)
+    Returns ({param: value Series}, {param: excluded mask}).
+    """
+    values, excluded = {}, {}
+    for param_name in df_manual.columns:
+        if param_name == 'Endpoint':
+            continue
+        raw = df_manual[param_name]
+        # Per-cell str() as the row-wise loop did: astype(str) would format dates
+        # (and other typed columns) differently and change the generated URLs
+        text = raw.map(lambda v: str(v).strip())
+        present = raw.notna() & (text != "")
+
+        # A. Value from the Manual Sheet, B. JSON Overrides (Rule #1)
+        if param_name in defaults:
+            final = pd.Series([defaults[param_name]] * len(raw), index=raw.index, dtype=object)
         else:
-            exclusions[param] = vals
-    return exclusions
+            final = text.astype(object)
+        values[param_name] = final.where(present, None)
+
+        # C. Exclusion (Rule #2)
+        blacklist = exclusions.get(param_name)
+        if blacklist:
+            excluded[param_name] = present & final.isin(blacklist)
+    return values, excluded
 
 def execute_planning_phase():
     print(f"\n[Phase 2] Loading & Validating Test Plan...")
@@ -49,66 +79,39 @@ def execute_planning_phase():
     defaults = load_json_defaults(json_file)
     exclusions = load_exclusions(exclusion_file)
 
-    test_cases = []
-    skipped_count = 0
-
     print(f"   -> Found {len(df_manual)} rows in manual plan.")
 
-    # 4. Iterate through your manual rows
-    for index, row in df_manual.iterrows():
-        # Basic Test Case Structure
-        # We assume column 1 is 'Endpoint' and others are parameters
-        if 'Endpoint' not in row:
-            print(f"   ⚠️ Row {index} skipped: Missing 'Endpoint' column.")
-            continue
-
-        endpoint = row['Endpoint']
-        current_params = {}
-        is_unsafe = False
-
-        # Loop through columns (Parameter Names)
-        for param_name in df_manual.columns:
-            if param_name == 'Endpoint': continue
-            
-            # A. Get Value from Manual Sheet
-            user_value = str(row[param_name]).strip()
-            if pd.isna(row[param_name]) or user_value == "":
-                continue # Skip empty cells
-
-            # B. Apply JSON Overrides (Rule #1)
-            # If JSON has a value for this param, we FORCE it.
-            if param_name in defaults:
-                final_val = defaults[param_name]
-            else:
-                final_val = user_value
-
-            # C. Check Exclusion (Rule #2)
-            # If the final value is in the blacklist, we mark this test as UNSAFE
-            blacklist = exclusions.get(param_name, [])
-            if final_val in blacklist:
-                print(f"   ⚠️ Skipping {endpoint}: Found excluded value '{final_val}' for '{param_name}'")
-                is_unsafe = True
-                break
-            
-            # Add to params map
-            current_params[param_name] = final_val
-
-        if is_unsafe:
-            skipped_count += 1
-            continue
+    # We assume column 1 is 'Endpoint' and others are parameters
+    if 'Endpoint' not in df_manual.columns:
+        print("   ⚠️ All rows skipped: Missing 'Endpoint' column.")
+        return []
 
-        # 5. Construct Final Test Object (Compatible with Phase 3)
-        # We need to distinguish Path vs Query params.
-        # Simple heuristic: If {param} is in URL -> Path, else -> Query
-        url_suffix = endpoint
-        query_params = {}
+    # 4. Evaluate the whole plan column by column
+    values, excluded = plan_columns(df_manual, defaults, exclusions)
+
+    # A row is UNSAFE if any of its values is blacklisted; it is reported
+    # against the first such parameter (column order)
+    skip_reason = pd.Series(None, index=df_manual.index, dtype=object)
+    skipped_by_param = {}
+    for param_name, mask in excluded.items():
+        first_hit = mask & skip_reason.isna()
+        if first_hit.any():
+            skip_reason[first_hit] = param_name
+            skipped_by_param[param_name] = values[param_name][first_hit].value_counts()
+    safe = skip_reason.isna()
+
+    # 5. Construct Final Test Objects (Compatible with Phase 3)
+    # Path vs Query: If {param} is in URL -> Path, else -> Query
+    test_cases = []
+    param_names = list(values)
+    rows = zip(df_manual['Endpoint'][safe], *(values[p][safe] for p in param_names))
+    for endpoint, *row_values in rows:
+        current_params = {p: v for p, v in zip(param_names, row_values) if v is not None}
 
-        for p_key, p_val in current_params.items():
-            token = f"{{{p_key}}}"
-            if token in url_suffix:
-                url_suffix = url_suffix.replace(token, str(p_val))
-            else:
-                query_params[p_key] = str(p_val)
+        template = compile_template(str(endpoint))
+        path_params, query_params = template.split_params(current_params)
+        url_suffix = template.render(path_params)
+        query_params = {k: str(v) for k, v in query_params.items()}
 
         test_cases.append({
             "test_id": f"TEST_{len(test_cases)+1:04d}",
@@ -117,5 +120,9 @@ def execute_planning_phase():
             "query_params": query_params
         })
 
+    skipped_count = int((~safe).sum())
     print(f"✅ Loaded {len(test_cases)} valid tests. (Skipped {skipped_count} excluded).")
+    for param_name, counts in skipped_by_param.items():
+        reasons = ", ".join(f"'{val}' x{n}" for val, n in counts.items())
+        print(f"   ⚠️ {param_name}: {int(counts.sum())} skipped - excluded values {reasons}")
     return test_cases
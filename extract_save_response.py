@@ -1,15 +1,17 @@
 import os
+import re
 import json
+import queue
+import hashlib
 import pandas as pd
-import requests
+import time
 import threading
 from concurrent.futures import ThreadPoolExecutor, as_completed
 from requests_ntlm import HttpNtlmAuth
 from dotenv import load_dotenv
 from API.auth import get_password
-import urllib3
-
-urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
+from pl_http import host_of, new_session, timed, loggable_headers
+from pl_response_store import ResponseStore
 
 # -------------------- LOAD ENV --------------------
 load_dotenv()
@@ -54,8 +56,57 @@ def build_url(base_url, endpoint_template, tag):
     except Exception as e:
         return None, [], f"REQUEST FORMAT ERROR: {str(e)}"
 
+# -------------------- SESSIONS --------------------
+# One keep-alive NTLM session per (worker thread, host): the handshake is paid
+# once per connection instead of once per request, and requests never wait on a lock.
+_local = threading.local()
+_all_sessions = []
+_sessions_lock = threading.Lock()
+
+def get_session(url):
+    sessions = getattr(_local, "sessions", None)
+    if sessions is None:
+        sessions = _local.sessions = {}
+    host = host_of(url)
+    if host not in sessions:
+        sessions[host] = new_session(AUTH)
+        with _sessions_lock:
+            _all_sessions.append(sessions[host])
+    return sessions[host]
+
+def close_sessions():
+    with _sessions_lock:
+        for session in _all_sessions:
+            session.close()
+        _all_sessions.clear()
+
+# -------------------- CASE IDS --------------------
+def case_id_for(tag, endpoint_template, params):
+    """
+    Deterministic, unique id per (tag, endpoint, params): readable prefix plus
+    a short hash of the sorted parameters, so reruns map onto the same id and
+    different parameter sets or endpoints never collide. The env is left out
+    (the index records it separately) so both sides of a case share the id.
+    """
+    key = json.dumps([tag, endpoint_template, sorted((str(k), str(v)) for k, v in params.items())])
+    digest = hashlib.sha1(key.encode("utf-8")).hexdigest()[:10]
+    slug = re.sub(r"[^A-Za-z0-9]+", "_", f"{tag}_{endpoint_template}").strip("_")
+    return f"{slug}_{digest}"
+
 # -------------------- WORKER FUNCTION --------------------
-def execute_single_request(row, env, output_folder, error_log, lock):
+def error_entry(env, tag, endpoint, error, missing=""):
+    return {
+        "System": system,
+        "Region": region,
+        "Env": env,
+        "Tag": tag,
+        "Endpoint": endpoint,
+        "Missing_variables": missing,
+        "Error": error
+    }
+
+def execute_single_request(row, env, store, errors):
+    """Fetch one (row, env) into the store; returns the capture result (None if no URL could be built)."""
     tag = str(row["Tags"]).strip()
     endpoint_template = row["Endpoint"]
     base_url = str(row[f"BASEURL_{env}"]).strip("/")
@@ -63,56 +114,56 @@ def execute_single_request(row, env, output_folder, error_log, lock):
     full_url, missing, error = build_url(base_url, endpoint_template, tag)
 
     if error:
-        with lock:
-            error_log.append({
-                "System": system,
-                "Region": region,
-                "Env": env,
-                "Tag": tag,
-                "Endpoint": endpoint_template,
-                "Missing_variables": ", ".join(missing),
-                "Error": error
-            })
+        errors.put(error_entry(env, tag, endpoint_template, error, ", ".join(missing)))
+        return None
+
+    params = testdata.get(tag, testdata.get("default", {}))
+    case_id = case_id_for(tag, endpoint_template, params)
+    result = {"case_id": case_id, "env": env, "endpoint": endpoint_template, "url": full_url,
+              "status": None, "error": None, "size": 0, "request_headers": None, "headers": None,
+              "dns": None, "connect": None, "tls": None, "ttfb": None, "elapsed": None}
+
+    # Timings in seconds; dns/connect/tls are 0 when a keep-alive connection was reused
+    with timed() as timing:
+        t0 = time.perf_counter()
+        try:
+            with get_session(full_url).get(full_url, timeout=30, stream=True) as response:
+                result["ttfb"] = time.perf_counter() - t0
+                result["status"] = response.status_code
+                result["request_headers"] = loggable_headers(response.request.headers)
+                result["headers"] = loggable_headers(response.headers)
+
+                if response.status_code == 200:
+                    result.update(store.put_stream(response))
+                else:
+                    result["error"] = f"HTTP {response.status_code}:{response.reason}"
+                    errors.put(error_entry(env, tag, full_url, result["error"]))
+
+        except Exception as e:
+            result["error"] = f"EXCEPTION: {str(e)}"
+            errors.put(error_entry(env, tag, full_url, result["error"]))
+
+        result["elapsed"] = time.perf_counter() - t0
+    result.update(dns=timing["dns"], connect=timing["connect"], tls=timing["tls"])
+    store.record(result)
+    return result
+
+# -------------------- METRICS --------------------
+def print_metrics(results, wall_time):
+    if not results:
+        print("No requests were sent.")
         return
+    latencies = sorted(r["elapsed"] for r in results)
+    ok = sum(1 for r in results if not r["error"])
+    total_bytes = sum(r.get("size") or 0 for r in results)
 
-    try:
-        response = requests.get(
-            full_url,
-            auth=AUTH,
-            timeout=30,
-            verify=False
-        )
-
-        if response.status_code == 200:
-            suffix = "_".join(testdata.get(tag, testdata.get("default", {})).keys())
-            filename = f"{tag}_{suffix}_{env}.json".replace(" ", "")
-            filepath = os.path.join(output_folder, filename)
-
-            with open(filepath, "w", encoding="utf-8") as f:
-                f.write(response.text)
-        else:
-            with lock:
-                error_log.append({
-                    "System": system,
-                    "Region": region,
-                    "Env": env,
-                    "Tag": tag,
-                    "Endpoint": full_url,
-                    "Missing_variables": "",
-                    "Error": f"HTTP {response.status_code}:{response.reason}"
-                })
+    def pct(p):
+        return latencies[min(len(latencies) - 1, int(p / 100 * len(latencies)))]
 
-    except Exception as e:
-        with lock:
-            error_log.append({
-                "System": system,
-                "Region": region,
-                "Env": env,
-                "Tag": tag,
-                "Endpoint": full_url,
-                "Missing_variables": "",
-                "Error": f"EXCEPTION: {str(e)}"
-            })
+    print(f"Requests: {len(results)} ({ok} ok, {len(results) - ok} failed) in {wall_time:.1f}s")
+    print(f"Throughput: {len(results) / wall_time:.1f} req/s, {total_bytes / wall_time / 1024 / 1024:.2f} MB/s "
+          f"({total_bytes / 1024 / 1024:.1f} MB)")
+    print(f"Latency: p50 {pct(50):.3f}s | p95 {pct(95):.3f}s | max {latencies[-1]:.3f}s")
 
 # -------------------- PUBLIC API FUNCTION --------------------
 def fetch_and_save_response():
@@ -136,39 +187,41 @@ def fetch_and_save_response():
         (df["Overall Match"] == True)
     ]
 
+    # Bodies are stored compressed and de-duplicated by hash; earlier runs stay
+    # in the store and are told apart by run_id in its index.
     output_folder = os.path.join(REPORTS_PATH, f"{system}_OUTPUT")
-    os.makedirs(output_folder, exist_ok=True)
-
-    for f in os.listdir(output_folder):
-        if f.endswith(".json"):
-            os.remove(os.path.join(output_folder, f))
+    store = ResponseStore(os.path.join(output_folder, "response_store"))
 
     error_file = os.path.join(REPORTS_PATH, "Response_Error.xlsx")
     if os.path.exists(error_file):
         os.remove(error_file)
 
-    error_log = []
-    lock = threading.Lock()
+    # Lock-free hand-off of error records from the workers
+    errors = queue.SimpleQueue()
     tasks = []
+    results = []
 
     max_workers = min(32, (os.cpu_count() or 1) * 5)
 
-    with ThreadPoolExecutor(max_workers=max_workers) as executor:
-        for _, row in filtered_df.iterrows():
-            for env in ["PRD", "UAT"]:
-                tasks.append(
-                    executor.submit(
-                        execute_single_request,
-                        row,
-                        env,
-                        output_folder,
-                        error_log,
-                        lock
-                    )
-                )
-
-        for _ in as_completed(tasks):
-            pass
+    t0 = time.perf_counter()
+    try:
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            for _, row in filtered_df.iterrows():
+                for env in ["PRD", "UAT"]:
+                    tasks.append(executor.submit(execute_single_request, row, env, store, errors))
+
+            for task in as_completed(tasks):
+                result = task.result()
+                if result is not None:
+                    results.append(result)
+    finally:
+        close_sessions()
+
+    print_metrics(results, time.perf_counter() - t0)
+
+    error_log = []
+    while not errors.empty():
+        error_log.append(errors.get())
 
     if error_log:
         pd.DataFrame(error_log).to_excel(error_file, index=False)
@@ -1,9 +1,10 @@
 import os
 import pandas as pd
-import requests
 from requests_ntlm import HttpNtlmAuth
 from dotenv import load_dotenv
 from API.auth import get_password
+from swagger_schema_index import SchemaIndex
+from swagger_spec_cache import SpecCache
 import json
 import urllib3
 
@@ -20,6 +21,7 @@ REPORT_PATH = os.path.join("shared", "reports")
 INPUT_PATH = os.path.join("shared", "input")
 SWAGGER_FILE = os.path.join(REPORT_PATH, "Swagger.xlsx")
 JSON_FILE = os.path.join(INPUT_PATH, "ApiTestData.json")
+SPEC_CACHE = SpecCache(os.path.join("shared", "cache", "swagger"))
 
 os.makedirs(REPORT_PATH, exist_ok=True)
 
@@ -33,50 +35,30 @@ urltype_filter = config.get("URLTYPE")
 
 AUTH = HttpNtlmAuth(USERNAME, PASSWORD)
 
-# ================= REF RESOLUTION =================
-def resolve_ref(openapi, ref):
-    if not ref or not ref.startswith("#/"):
-        return {}
-    node = openapi
-    for part in ref[2:].split("/"):
-        node = node.get(part, {})
-    return node if isinstance(node, dict) else {}
-
-def extract_enum(schema, openapi):
-    if not schema:
-        return []
-
-    if "$ref" in schema:
-        schema = resolve_ref(openapi, schema["$ref"])
-
-    if "enum" in schema:
-        return schema["enum"]
-
-    for k in ("allOf", "oneOf", "anyOf"):
-        if k in schema:
-            enums = []
-            for s in schema[k]:
-                enums.extend(extract_enum(s, openapi))
-            return list(dict.fromkeys(enums))
-
-    return []
-
 # ================= CORE EXTRACTION =================
 def extract_endpoints(baseurl, swagger_url, system, region, env, urltype):
     rows = []
     errors = []
 
     try:
-        r = requests.get(swagger_url, auth=AUTH, verify=False)
-        if r.status_code != 200:
+        r = SPEC_CACHE.fetch(swagger_url, auth=AUTH)
+        if not r.ok:
             return [], [{
                 "System": system, "Region": region, "Env": env,
                 "SwaggerURL": swagger_url, "URLTYPE": urltype,
                 "Error": f"HTTP {r.status_code}"
             }]
 
+        # ---- unchanged spec: reuse the rows extracted last run ----
+        context = f"param|{system}|{region}|{env}|{urltype}|{baseurl}"
+        if not r.changed:
+            cached_rows = SPEC_CACHE.load_rows(swagger_url, context)
+            if cached_rows is not None:
+                return cached_rows, None
+
         openapi = r.json()
         paths = openapi.get("paths", {})
+        index = SchemaIndex(openapi)
 
         for path, methods in paths.items():
             for method, spec in methods.items():
@@ -91,7 +73,7 @@ def extract_endpoints(baseurl, swagger_url, system, region, env, urltype):
                 for p in params:
                     schema = p.get("schema", {})
                     schema_ref = schema.get("$ref")
-                    enum_vals = extract_enum(schema, openapi)
+                    enum_vals = index.enums(schema)
 
                     rows.append({
                         "System": system,
@@ -113,6 +95,7 @@ def extract_endpoints(baseurl, swagger_url, system, region, env, urltype):
                         "Enum_Count": len(enum_vals)
                     })
 
+        SPEC_CACHE.save_rows(swagger_url, context, rows)
         return rows, None
 
     except Exception as e:
@@ -1,10 +1,11 @@
 import os
 import json
 import pandas as pd
-import requests
 from dotenv import load_dotenv
 from requests_ntlm import HttpNtlmAuth
 from API.auth import get_password
+from swagger_schema_index import SchemaIndex
+from swagger_spec_cache import SpecCache
 import urllib3
 
 urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
@@ -20,6 +21,7 @@ REPORT_PATH = os.path.join("shared", "reports")
 INPUT_PATH = os.path.join("shared", "input")
 SWAGGER_FILE = os.path.join(REPORT_PATH, "Swagger.xlsx")
 JSON_FILE = os.path.join(INPUT_PATH, "ApiTestData.json")
+SPEC_CACHE = SpecCache(os.path.join("shared", "cache", "swagger"))
 
 os.makedirs(REPORT_PATH, exist_ok=True)
 
@@ -31,42 +33,14 @@ SYSTEM_FILTER = config.get("System")
 REGION_FILTER = config.get("Region")
 URLTYPE_FILTER = config.get("URLTYPE")
 
-# ================= REF / ENUM RESOLUTION =================
-def resolve_ref(openapi, ref):
-    if not ref or not ref.startswith("#/"):
-        return {}
-    node = openapi
-    for part in ref[2:].split("/"):
-        node = node.get(part, {})
-    return node if isinstance(node, dict) else {}
-
-def extract_enum(schema, openapi):
-    if not schema:
-        return []
-
-    if "$ref" in schema:
-        schema = resolve_ref(openapi, schema["$ref"])
-
-    if "enum" in schema:
-        return schema["enum"]
-
-    for key in ("allOf", "oneOf", "anyOf"):
-        if key in schema:
-            enums = []
-            for s in schema[key]:
-                enums.extend(extract_enum(s, openapi))
-            return list(dict.fromkeys(enums))
-
-    return []
-
 # ================= CORE EXTRACTION =================
 def extract_endpoints(baseurl, swagger_url, system, region, env, urltype):
     rows = []
     errors = []
 
     try:
-        resp = requests.get(swagger_url, auth=AUTH, verify=False)
-        if resp.status_code != 200:
+        resp = SPEC_CACHE.fetch(swagger_url, auth=AUTH)
+        if not resp.ok:
             return [], [{
                 "System": system,
                 "Region": region,
@@ -76,8 +50,16 @@ def extract_endpoints(baseurl, swagger_url, system, region, env, urltype):
                 "Error": f"HTTP {resp.status_code}"
             }]
 
+        # ---- unchanged spec: reuse the rows extracted last run ----
+        context = f"endpoint|{system}|{region}|{env}|{urltype}|{baseurl}"
+        if not resp.changed:
+            cached_rows = SPEC_CACHE.load_rows(swagger_url, context)
+            if cached_rows is not None:
+                return cached_rows, None
+
         openapi = resp.json()
         paths = openapi.get("paths", {})
+        index = SchemaIndex(openapi)
 
         for path, methods in paths.items():
             for method, spec in methods.items():
@@ -103,7 +85,7 @@ def extract_endpoints(baseurl, swagger_url, system, region, env, urltype):
                     schema = p.get("schema", {})
                     schema_ref = schema.get("$ref", schema.get("type", ""))
 
-                    enums = extract_enum(schema, openapi)
+                    enums = index.enums(schema)
 
                     param_names.append(name)
                     param_in.append(location)
@@ -134,6 +116,7 @@ def extract_endpoints(baseurl, swagger_url, system, region, env, urltype):
                     "Enum_Map": "; ".join(enum_map),
                 })
 
+        SPEC_CACHE.save_rows(swagger_url, context, rows)
         return rows, None
 
     except Exception as e:
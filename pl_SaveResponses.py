@@ -1,14 +1,12 @@
 import os
 import json
 import pandas as pd
-import requests
 from dotenv import load_dotenv
 from requests_ntlm import HttpNtlmAuth
 from auth import get_password
 from unicodedata import normalize
-import urllib3
-
-urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
+from pl_response_capture import capture_all
+from pl_response_store import ResponseStore, response_ref
 
 # -------------------- CONFIG --------------------
 load_dotenv()
@@ -28,26 +26,23 @@ SYSTEM = api_data.get("System", "UNKNOWN")
 REPORT_BASE = os.path.join("shared", "reports", SYSTEM)
 os.makedirs(REPORT_BASE, exist_ok=True)
 
+# Compressed, de-duplicated response bodies + capture index
+STORE = ResponseStore(os.path.join(REPORT_BASE, "response_store"))
+
 # Output Excel File
 OUTPUT_XLSX = os.path.join("shared", "reports", "pl_responseComparison.xlsx")
 ERROR_LOG_XLSX = os.path.join("shared", "reports", "RESPONSE_ERROR.xlsx")
 
+# Concurrent requests per host (SOURCE and TARGET hosts are limited separately)
+PER_HOST_CONCURRENCY = int(os.getenv("PER_HOST_CONCURRENCY", "8"))
+
 # -------------------- HELPERS --------------------
 def clean(val):
     return normalize("NFKC", str(val)).replace("\u00A0", "").replace("\u200B", "").strip()
 
-def fetch_and_save(tag_id, url, env):
-    """Fetch API and save response as JSON"""
-    try:
-        response = requests.get(url, auth=AUTH, headers={"Accept": "application/json"}, timeout=30, verify=False)
-        response.raise_for_status()
-        file_name = f"{tag_id}_{env}.json"
-        out_path = os.path.join(REPORT_BASE, file_name)
-        with open(out_path, "w", encoding="utf-8") as f:
-            f.write(response.text)
-        return True, None, file_name
-    except Exception as e:
-        return False, str(e), None
+def capture_request(tag_id, url, env):
+    """Capture request for one side; the body goes into STORE"""
+    return {"case_id": tag_id, "env": env, "url": url}
 
 # -------------------- MAIN --------------------
 def main():
@@ -55,6 +50,7 @@ def main():
     output_rows = []
     error_logs = []
 
+    rows, cases = [], []
     for _, row in df.iterrows():
         tag_id = str(row.get("TestCaseID")).strip()
         tag = str(row.get("TagName")).strip()
@@ -63,7 +59,7 @@ def main():
         src_url = clean(row.get("SourceRequestURL", ""))
         tgt_url = clean(row.get("TargetRequestURL", ""))
 
-        row_result = {
+        rows.append({
             "TestCaseID": tag_id,
             "TagName": tag,
             "SourceBaseURL": src_base,
@@ -75,23 +71,30 @@ def main():
             "TargetResponse": "",
             "ComparisonResult": "",
             "Comments": ""
-        }
-
-        # ----- Source -----
-        src_success, src_err, src_file = fetch_and_save(tag_id, src_url, "Source") if src_url else (False, "Missing URL", None)
-        if src_success:
-            row_result["SourceResponse"] = src_file
-        else:
-            error_logs.append({"TestCaseID": tag_id, "TagName": tag, "Endpoint": src_url, "Error": src_err})
-
-        # ----- Target -----
-        tgt_success, tgt_err, tgt_file = fetch_and_save(tag_id, tgt_url, "Target") if tgt_url else (False, "Missing URL", None)
-        if tgt_success:
-            row_result["TargetResponse"] = tgt_file
-        else:
-            error_logs.append({"TestCaseID": tag_id, "TagName": tag, "Endpoint": tgt_url, "Error": tgt_err})
+        })
+        cases.append([capture_request(tag_id, url, env)
+                      for env, url in (("Source", src_url), ("Target", tgt_url)) if url])
+
+    # ----- Source + Target fetched concurrently for every case -----
+    results = capture_all(cases, auth=AUTH, per_host=PER_HOST_CONCURRENCY, store=STORE)
+
+    for row_result, case, case_results in zip(rows, cases, results):
+        status = {"Source": (False, "Missing URL"), "Target": (False, "Missing URL")}
+        for r in case_results:
+            status[r["env"]] = (r["error"] is None, r["error"])
+            if r["error"] is None:
+                # Stored body reference; equal refs mean identical payloads
+                row_result[f"{r['env']}Response"] = response_ref(r["sha256"])
+            else:
+                error_logs.append({"TestCaseID": row_result["TestCaseID"], "TagName": row_result["TagName"],
+                                   "Endpoint": r["url"], "Error": r["error"]})
+        for env in ("Source", "Target"):
+            if not any(r["env"] == env for r in case):
+                error_logs.append({"TestCaseID": row_result["TestCaseID"], "TagName": row_result["TagName"],
+                                   "Endpoint": "", "Error": "Missing URL"})
 
         # ----- Summary Status -----
+        (src_success, src_err), (tgt_success, tgt_err) = status["Source"], status["Target"]
         if src_success and tgt_success:
             row_result["Response"] = "FETCHED"
         else:
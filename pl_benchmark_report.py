@@ -0,0 +1,129 @@
+import os
+import re
+import json
+import pandas as pd
+from urllib.parse import urlsplit
+from dotenv import load_dotenv
+from pl_response_store import ResponseStore
+
+# -------------------- CONFIG --------------------
+load_dotenv()
+APITESTDATA_FILE = "shared/input/ApiTestData.json"
+with open(APITESTDATA_FILE, "r") as f:
+    SYSTEM = json.load(f).get("System", "UNKNOWN")
+
+# Capture index written by pl_pipeline / pl_SaveResponses / pl_fetch_response1;
+# point BENCHMARK_STORE at another store (e.g. extract_save_response's) if needed
+STORE_DIR = os.getenv("BENCHMARK_STORE", os.path.join("shared", "reports", SYSTEM, "response_store"))
+OUTPUT_XLSX = os.path.join("shared", "reports", f"{SYSTEM}_benchmark.xlsx")
+
+# Run to report on (default: the most recent run in the index)
+RUN_ID = os.getenv("BENCHMARK_RUN_ID")
+
+# The candidate is compared against the baseline (case-insensitive, e.g. PRD / UAT)
+BASELINE_ENV = os.getenv("BASELINE_ENV", "SOURCE").upper()
+CANDIDATE_ENV = os.getenv("CANDIDATE_ENV", "TARGET").upper()
+
+# Candidate p95 above baseline p95 by more than this fraction - and by at least
+# MIN_DELTA_MS, so fast endpoints are not flagged for noise - is a regression
+REGRESSION_THRESHOLD = float(os.getenv("REGRESSION_THRESHOLD", "0.2"))
+MIN_DELTA_MS = float(os.getenv("REGRESSION_MIN_DELTA_MS", "50"))
+
+PERCENTILES = (50, 95, 99)
+ID_SEGMENT = re.compile(r"\d")
+
+
+# -------------------- GROUPING --------------------
+def endpoint_key(entry):
+    """
+    Endpoint an entry belongs to: the template recorded at capture time, else
+    the URL path with host and query dropped and every segment containing a
+    digit (ids, dates) replaced by "{}".
+    """
+    if entry.get("endpoint"):
+        return entry["endpoint"]
+    path = urlsplit(entry.get("url") or "").path
+    return "/".join("{}" if ID_SEGMENT.search(seg) else seg for seg in path.split("/"))
+
+
+def load_entries(store, run_id=None):
+    """Index entries of `run_id` (default: the latest run) as a DataFrame, one row per request."""
+    entries = list(store.entries(run_id))
+    if not entries:
+        return pd.DataFrame(), run_id
+    if run_id is None:
+        run_id = entries[-1]["run_id"]
+        entries = [e for e in entries if e.get("run_id") == run_id]
+    df = pd.DataFrame(entries)
+    for col in ("dns", "connect", "tls", "ttfb", "elapsed", "size"):
+        if col not in df:
+            df[col] = None  # entries from before timings were recorded
+        df[col] = pd.to_numeric(df[col], errors="coerce")
+    df["env"] = df["env"].astype(str).str.upper()
+    df["endpoint"] = [endpoint_key(e) for e in entries]
+    return df, run_id
+
+
+# -------------------- STATS --------------------
+def env_stats(group):
+    """Latency / size figures for one endpoint in one env (ms, successful requests only)."""
+    ok = group[group["error"].isna()]
+    total = ok["elapsed"] * 1000
+    stats = {"N": len(group), "Errors": len(group) - len(ok)}
+    for q in PERCENTILES:
+        stats[f"p{q} (ms)"] = round(total.quantile(q / 100), 1) if len(ok) else None
+    stats["TTFB p50 (ms)"] = round(ok["ttfb"].median() * 1000, 1) if ok["ttfb"].notna().any() else None
+    # Connection setup only where a new connection was opened
+    setup = (ok["dns"] + ok["connect"] + ok["tls"]) * 1000
+    setup = setup[setup > 0]
+    stats["Connect p50 (ms)"] = round(setup.median(), 1) if len(setup) else None
+    stats["Avg Bytes"] = int(ok["size"].mean()) if ok["size"].notna().any() else None
+    return stats
+
+
+def benchmark(df, baseline=BASELINE_ENV, candidate=CANDIDATE_ENV,
+              threshold=REGRESSION_THRESHOLD, min_delta_ms=MIN_DELTA_MS):
+    """One row per endpoint: baseline and candidate stats side by side plus the p95 verdict."""
+    rows = []
+    for endpoint, group in df.groupby("endpoint", sort=True):
+        row = {"Endpoint": endpoint}
+        for env in (baseline, candidate):
+            for name, value in env_stats(group[group["env"] == env]).items():
+                row[f"{env} {name}"] = value
+        base, cand = row[f"{baseline} p95 (ms)"], row[f"{candidate} p95 (ms)"]
+        if base is None or cand is None or pd.isna(base) or pd.isna(cand):
+            row["p95 Change %"], row["Verdict"] = None, "NO DATA"
+        else:
+            row["p95 Change %"] = round((cand - base) / base * 100, 1) if base else None
+            if cand > base * (1 + threshold) and cand - base >= min_delta_ms:
+                row["Verdict"] = "REGRESSION"
+            elif base > cand * (1 + threshold) and base - cand >= min_delta_ms:
+                row["Verdict"] = "IMPROVED"
+            else:
+                row["Verdict"] = "OK"
+        rows.append(row)
+    return pd.DataFrame(rows)
+
+
+# -------------------- MAIN --------------------
+def main():
+    store = ResponseStore(STORE_DIR)
+    df, run_id = load_entries(store, RUN_ID)
+    if df.empty:
+        print(f"No captured requests in {store.index_path}" + (f" for run {run_id}" if run_id else ""))
+        return
+
+    report = benchmark(df)
+    report.to_excel(OUTPUT_XLSX, index=False)
+
+    verdicts = report["Verdict"].value_counts()
+    print(f"Run {run_id}: {len(df)} requests, {len(report)} endpoints, {CANDIDATE_ENV} vs {BASELINE_ENV}")
+    print(" | ".join(f"{v}: {verdicts.get(v, 0)}" for v in ("REGRESSION", "IMPROVED", "OK", "NO DATA")))
+    for _, row in report[report["Verdict"] == "REGRESSION"].iterrows():
+        print(f"  ⚠️ {row['Endpoint']}: p95 {row[f'{BASELINE_ENV} p95 (ms)']} → "
+              f"{row[f'{CANDIDATE_ENV} p95 (ms)']} ms ({row['p95 Change %']:+}%)")
+    print(f"✅ Benchmark report → {OUTPUT_XLSX}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,50 @@
+import asyncio
+from playwright.async_api import async_playwright
+
+# -------------------- CONFIG --------------------
+# Resource types never needed to read Swagger UI / dashboard content
+BLOCKED_RESOURCE_TYPES = {"image", "font", "stylesheet", "media"}
+
+
+# -------------------- HELPERS --------------------
+async def block_heavy_resources(route):
+    if route.request.resource_type in BLOCKED_RESOURCE_TYPES:
+        await route.abort()
+    else:
+        await route.continue_()
+
+
+# -------------------- RUNNER --------------------
+async def run_environments(jobs, worker, headless=True, block_resources=True, context_options=None):
+    """
+    Drive several environments at once from ONE browser.
+
+    jobs:    {env_name: arg}  e.g. {"SOURCE": url, "TARGET": url}
+    worker:  async worker(page, env_name, arg) -> result
+
+    Each environment gets its own context (separate cookies / SSO session) and
+    page, and all pages run concurrently. Returns {env_name: result}; a job that
+    raised maps to its exception so one broken environment does not lose the other.
+    """
+    async with async_playwright() as p:
+        browser = await p.chromium.launch(headless=headless)
+
+        async def run_one(env_name, arg):
+            context = await browser.new_context(**(context_options or {}))
+            if block_resources:
+                await context.route("**/*", block_heavy_resources)
+            page = await context.new_page()
+            try:
+                return await worker(page, env_name, arg)
+            finally:
+                await context.close()
+
+        try:
+            results = await asyncio.gather(
+                *(run_one(env_name, arg) for env_name, arg in jobs.items()),
+                return_exceptions=True
+            )
+        finally:
+            await browser.close()
+
+    return dict(zip(jobs.keys(), results))
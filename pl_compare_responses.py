@@ -1,12 +1,21 @@
 import os
 import json
 import pandas as pd
-from deepdiff import DeepDiff
 from dotenv import load_dotenv
+from pl_response_store import ResponseStore, parse_ref
+from pl_json_compare import diff_json
+from pl_json_stream import collect_diffs, require_ijson
+from pl_compare_runner import compare_in_parallel
+from pl_compare_rules import ComparisonRules
 
 # -------- Load env vars --------
 load_dotenv()
 INPUT_XLSX = "shared/input/pl_responseFiles.xlsx"
+# COMPARE_INPUT=index reads the pairs straight from the response store index
+# (pl_pipeline / pl_SaveResponses / pl_fetch_response1) instead of INPUT_XLSX;
+# COMPARE_RUN_ID picks the run (default: the latest)
+COMPARE_INPUT = os.getenv("COMPARE_INPUT", "excel").lower()
+COMPARE_RUN_ID = os.getenv("COMPARE_RUN_ID")
 APITESTDATA_FILE = "shared/input/ApiTestData.json"
 
 # -------- Output File --------
@@ -17,6 +26,24 @@ with open(APITESTDATA_FILE, "r") as f:
     SYSTEM = json.load(f).get("System", "UNKNOWN")
 
 RESPONSE_FOLDER = os.path.join("shared", "reports", SYSTEM)
+STORE = ResponseStore(os.path.join(RESPONSE_FOLDER, "response_store"))
+RULES = ComparisonRules.load()
+
+# Processes used to compare pairs (default: one per core; 1 = in-process)
+COMPARE_WORKERS = int(os.getenv("COMPARE_WORKERS", "0")) or None
+
+# Every pair is loaded and compared order-insensitively unless COMPARE_MODE=stream:
+# then pairs larger than STREAM_THRESHOLD_MB (uncompressed, either side; 0 = all)
+# are streamed instead. Streaming compares arrays by position, so a reordered
+# array is a difference there - such rows are marked in CompareMode.
+# Streaming needs the ijson package (pip install ijson).
+COMPARE_MODE = os.getenv("COMPARE_MODE", "memory").lower()
+if COMPARE_MODE == "stream":
+    require_ijson()  # fail before the run, not on the first large pair
+STREAM_THRESHOLD_MB = float(os.getenv("STREAM_THRESHOLD_MB", "100"))
+STREAMED_MODE = "streamed (arrays by position)"
+IN_MEMORY_MODE = "in-memory (ignore order)"
+MAX_STREAM_DIFFS = 50
 
 # -------- Helper to Load JSON File --------
 def load_json(filepath):
@@ -26,49 +53,112 @@ def load_json(filepath):
     except Exception as e:
         return None
 
+def load_response(ref):
+    """Response column value -> JSON: 'sha256:...' from the store, else a file name"""
+    sha256 = parse_ref(ref)
+    if sha256 is None:
+        return load_json(os.path.join(RESPONSE_FOLDER, ref))
+    try:
+        return STORE.load_json(sha256)
+    except Exception:
+        return None
+
+def open_response(ref):
+    """Binary file object over a response body (store ref or file name)"""
+    sha256 = parse_ref(ref)
+    if sha256 is None:
+        return open(os.path.join(RESPONSE_FOLDER, ref), "rb")
+    return STORE.open(sha256)
+
+def response_size(ref):
+    sha256 = parse_ref(ref)
+    try:
+        if sha256 is None:
+            return os.path.getsize(os.path.join(RESPONSE_FOLDER, ref))
+        return STORE.size(sha256)
+    except OSError:
+        return 0
+
+def use_streaming(src_ref, tgt_ref):
+    if COMPARE_MODE != "stream":
+        return False
+    limit = STREAM_THRESHOLD_MB * 1024 * 1024
+    return response_size(src_ref) > limit or response_size(tgt_ref) > limit
+
+def stream_compare(src_ref, tgt_ref, rules=None):
+    """Incremental leaf-by-leaf diff; returns (diff_count, first MAX_STREAM_DIFFS diffs) or None if unreadable"""
+    try:
+        with open_response(src_ref) as src_fp, open_response(tgt_ref) as tgt_fp:
+            return collect_diffs(src_fp, tgt_fp, rules, max_diffs=MAX_STREAM_DIFFS)
+    except Exception:
+        return None
+
 # -------- Main Comparison --------
-def compare_jsons(source_data, target_data):
+def compare_jsons(source_data, target_data, keys=None, rules=None):
     if source_data is None or target_data is None:
         return "NotMatch", "Missing or invalid JSON"
-    diff = DeepDiff(source_data, target_data, ignore_order=True)
+    # Ignored paths are pruned, then canonical hashes first; DeepDiff only runs
+    # on the subtrees that differ. Arrays of records with configured key fields
+    # are joined on those keys, numeric leaves compared within tolerance.
+    diff = diff_json(source_data, target_data, ignore_order=True, keys=keys, rules=rules)
     if not diff:
         return "Match", ""
     return "NotMatch", str(diff)
 
+def compare_row(row):
+    """Loads and compares one SOURCE/TARGET pair - runs inside a worker process"""
+    testcase_id = str(row.get("TestCaseID", "")).strip()
+    tag = str(row.get("TagName", "")).strip()
+    src_base = str(row.get("SourceBaseURL", "")).strip()
+    tgt_base = str(row.get("TargetBaseURL", "")).strip()
+    src_url = str(row.get("SourceRequestURL", "")).strip()
+    tgt_url = str(row.get("TargetRequestURL", "")).strip()
+    src_file = str(row.get("SourceResponse", "")).strip()
+    tgt_file = str(row.get("TargetResponse", "")).strip()
+
+    src_hash, tgt_hash = parse_ref(src_file), parse_ref(tgt_file)
+    if src_hash and src_hash == tgt_hash and STORE.has(src_hash):
+        # Same stored body on both sides - identical bytes, nothing to diff
+        mode = "identical body"
+        result, comment = "Match", ""
+    elif use_streaming(src_file, tgt_file):
+        mode = STREAMED_MODE
+        streamed = stream_compare(src_file, tgt_file, RULES.path_rules_for(src_url))
+        if streamed is None:
+            result, comment = "NotMatch", "Missing or invalid JSON"
+        else:
+            count, diffs = streamed
+            result = "Match" if count == 0 else "NotMatch"
+            comment = f"{count} difference(s) ({STREAMED_MODE}): {diffs}"
+    else:
+        mode = IN_MEMORY_MODE
+        src_json = load_response(src_file)
+        tgt_json = load_response(tgt_file)
+        result, comment = compare_jsons(src_json, tgt_json, keys=RULES.keys_for(src_url),
+                                        rules=RULES.path_rules_for(src_url))
+
+    return {
+        "TestCaseID": testcase_id,
+        "TagName": tag,
+        "SourceBaseURL": src_base,
+        "TargetBaseURL": tgt_base,
+        "SourceRequestURL": src_url,
+        "TargetRequestURL": tgt_url,
+        "SourceResponse": src_file,
+        "TargetResponse": tgt_file,
+        "ComparisonResult": result,
+        "Comments": comment if result == "NotMatch" else "",
+        "CompareMode": mode
+    }
+
 def main():
-    df = pd.read_excel(INPUT_XLSX)
-    output_rows = []
-
-    for _, row in df.iterrows():
-        testcase_id = str(row.get("TestCaseID", "")).strip()
-        tag = str(row.get("TagName", "")).strip()
-        src_base = str(row.get("SourceBaseURL", "")).strip()
-        tgt_base = str(row.get("TargetBaseURL", "")).strip()
-        src_url = str(row.get("SourceRequestURL", "")).strip()
-        tgt_url = str(row.get("TargetRequestURL", "")).strip()
-        src_file = str(row.get("SourceResponse", "")).strip()
-        tgt_file = str(row.get("TargetResponse", "")).strip()
-
-        src_path = os.path.join(RESPONSE_FOLDER, src_file)
-        tgt_path = os.path.join(RESPONSE_FOLDER, tgt_file)
-
-        src_json = load_json(src_path)
-        tgt_json = load_json(tgt_path)
-
-        result, comment = compare_jsons(src_json, tgt_json)
-
-        output_rows.append({
-            "TestCaseID": testcase_id,
-            "TagName": tag,
-            "SourceBaseURL": src_base,
-            "TargetBaseURL": tgt_base,
-            "SourceRequestURL": src_url,
-            "TargetRequestURL": tgt_url,
-            "SourceResponse": src_file,
-            "TargetResponse": tgt_file,
-            "ComparisonResult": result,
-            "Comments": comment if result == "NotMatch" else ""
-        })
+    if COMPARE_INPUT == "index":
+        rows = STORE.comparison_rows(COMPARE_RUN_ID)
+        print(f"Comparing {len(rows)} captured pairs from {STORE.index_path}")
+    else:
+        df = pd.read_excel(INPUT_XLSX)
+        rows = (row.to_dict() for _, row in df.iterrows())
+    output_rows = list(compare_in_parallel(rows, compare_row, workers=COMPARE_WORKERS))
 
     pd.DataFrame(output_rows).to_excel(OUTPUT_XLSX, index=False)
     print(f"✅ Comparison complete. Output written to → {OUTPUT_XLSX}")
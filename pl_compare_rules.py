@@ -0,0 +1,241 @@
+import os
+import json
+from fnmatch import fnmatch
+from urllib.parse import urlparse
+
+# -------------------- CONFIG --------------------
+RULES_FILE = os.path.join("shared", "input", "ComparisonRules.json")
+_ANY = object()
+
+
+# -------------------- PATH RULES --------------------
+class _Node:
+    __slots__ = ("children", "star", "dstar", "loop", "ignore", "tolerance")
+
+    def __init__(self, loop=False):
+        self.children = {}
+        self.star = None       # "*"  - exactly one segment
+        self.dstar = None      # "**" - any number of segments
+        self.loop = loop       # this node IS a "**" and absorbs further segments
+        self.ignore = False
+        self.tolerance = None  # (rule order, abs, rel)
+
+
+class PathRules:
+    """
+    Ignore and tolerance globs for one endpoint, compiled once into a trie.
+
+    Patterns are dotted paths from the document root: a literal key or array
+    index per segment, "*" for exactly one segment, "**" for any number:
+        "timestamp"      top-level key only
+        "**.traceId"     at any depth
+        "data.*.price"   price of every element of data
+
+    A walk keeps a "state" (the set of trie nodes still matching) and steps it
+    one key / index at a time; transitions are memoised per state, with every
+    segment no rule names sharing one entry, so a state is computed once per
+    distinct rule branch rather than per node of the payload. An empty
+    state means no rule can match anywhere below - callers stop checking there.
+    """
+
+    def __init__(self, ignore=None, tolerances=None):
+        self.root = _Node()
+        for pattern in ignore or []:
+            self._insert(pattern).ignore = True
+        for order, (pattern, tol) in enumerate((tolerances or {}).items()):
+            node = self._insert(pattern)
+            if node.tolerance is None:
+                node.tolerance = (order, float(tol.get("abs", 0)), float(tol.get("rel", 0)))
+        self.empty = not (ignore or tolerances)
+        self.root_state = self._closure({self.root})
+        self._steps = {}
+        self._info = {}
+
+    def _insert(self, pattern):
+        node = self.root
+        for seg in str(pattern).split("."):
+            if seg == "**":
+                if node.dstar is None:
+                    node.dstar = _Node(loop=True)
+                node = node.dstar
+            elif seg == "*":
+                if node.star is None:
+                    node.star = _Node()
+                node = node.star
+            else:
+                node = node.children.setdefault(seg, _Node())
+        return node
+
+    @staticmethod
+    def _closure(nodes):
+        # "**" also matches zero segments
+        result, todo = set(), list(nodes)
+        while todo:
+            node = todo.pop()
+            if node not in result:
+                result.add(node)
+                if node.dstar is not None:
+                    todo.append(node.dstar)
+        return frozenset(result)
+
+    # ---------- walking ----------
+    def step(self, state, segment):
+        """State after descending into key / index `segment`."""
+        if not state:
+            return state
+        entry = self._steps.get(state)
+        if entry is None:
+            literals = set().union(*(node.children for node in state))
+            entry = self._steps[state] = ({}, literals)
+        transitions, literals = entry
+        seg = segment if isinstance(segment, str) else str(segment)
+        key = seg if seg in literals else _ANY
+        nxt = transitions.get(key)
+        if nxt is None:
+            nodes = set()
+            for node in state:
+                if key is seg and seg in node.children:
+                    nodes.add(node.children[seg])
+                if node.star is not None:
+                    nodes.add(node.star)
+                if node.loop:
+                    nodes.add(node)
+            nxt = transitions[key] = self._closure(nodes)
+        return nxt
+
+    def lookup(self, segments):
+        """(ignored, state) for a full path - ignored if the path or any parent is."""
+        state = self.root_state
+        for seg in segments:
+            state = self.step(state, seg)
+            if not state:
+                break
+            if self.ignored(state):
+                return True, state
+        return False, state
+
+    def _state_info(self, state):
+        if state not in self._info:
+            tolerances = [node.tolerance for node in state if node.tolerance is not None]
+            self._info[state] = (
+                any(node.ignore for node in state),
+                min(tolerances)[1:] if tolerances else None,
+            )
+        return self._info[state]
+
+    def ignored(self, state):
+        return bool(state) and self._state_info(state)[0]
+
+    def tolerance(self, state):
+        """(abs, rel) for a numeric leaf in this state, or None."""
+        return self._state_info(state)[1] if state else None
+
+    def numbers_equal(self, state, a, b):
+        """Numeric comparison under the state's tolerance: |a - b| <= max(abs, rel * max(|a|, |b|))."""
+        if a == b:
+            return True
+        tol = self.tolerance(state)
+        if tol is None:
+            return False
+        abs_tol, rel_tol = tol
+        return abs(a - b) <= max(abs_tol, rel_tol * max(abs(a), abs(b)))
+
+    # ---------- pruning ----------
+    def prune(self, data, state=None):
+        """
+        `data` without its ignored subtrees. Containers with nothing ignored
+        below them are returned as-is (not copied), and the walk stops as soon
+        as no rule can match further down.
+        """
+        state = self.root_state if state is None else state
+        if not state or self.empty:
+            return data
+        if isinstance(data, dict):
+            out, changed = {}, False
+            for k, v in data.items():
+                child = self.step(state, k)
+                if self.ignored(child):
+                    changed = True
+                    continue
+                pv = self.prune(v, child)
+                changed = changed or pv is not v
+                out[k] = pv
+            return out if changed else data
+        if isinstance(data, list):
+            out, changed = [], False
+            for i, v in enumerate(data):
+                child = self.step(state, i)
+                if self.ignored(child):
+                    changed = True
+                    continue
+                pv = self.prune(v, child)
+                changed = changed or pv is not v
+                out.append(pv)
+            return out if changed else data
+        return data
+
+
+def is_number(value):
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+# -------------------- ENDPOINT RULES --------------------
+class ComparisonRules:
+    """
+    Per-endpoint comparison rules, read from a JSON file such as:
+
+        {
+          "endpoints": {
+            "*/trades*":    {"keys": [["tradeId"]],
+                             "tolerances": {"**.price": {"abs": 0.01}, "**.pv": {"rel": 1e-6}}},
+            "*/positions*": {"keys": [["book", "positionId"]]},
+            "*":            {"ignore": ["timestamp", "serverTime", "**.traceId"]}
+          }
+        }
+
+    Endpoint patterns are globs matched against the request URL path. Every
+    matching pattern applies, in file order, so a catch-all "*" acts as the
+    default. "ignore" and "tolerances" take dotted path patterns (see
+    PathRules). A missing file means no rules.
+    """
+
+    def __init__(self, endpoints=None):
+        self.endpoints = list((endpoints or {}).items())
+        self._cache = {}
+        self._compiled = {}
+
+    @classmethod
+    def load(cls, path=RULES_FILE):
+        if not os.path.exists(path):
+            return cls()
+        with open(path, "r", encoding="utf-8") as f:
+            return cls(json.load(f).get("endpoints", {}))
+
+    def matching(self, url):
+        path = urlparse(str(url)).path or str(url)
+        return [rule for pattern, rule in self.endpoints if fnmatch(path, pattern)]
+
+    def keys_for(self, url):
+        """Key-field sets for arrays of records in responses of this endpoint."""
+        if url not in self._cache:
+            keys = []
+            for rule in self.matching(url):
+                for key_fields in rule.get("keys", []):
+                    key_fields = [key_fields] if isinstance(key_fields, str) else list(key_fields)
+                    if key_fields not in keys:
+                        keys.append(key_fields)
+            self._cache[url] = keys
+        return self._cache[url]
+
+    def path_rules_for(self, url):
+        """Compiled ignore / tolerance rules of this endpoint (shared by endpoints with the same rule set)."""
+        rules = self.matching(url)
+        signature = tuple(id(rule) for rule in rules)
+        if signature not in self._compiled:
+            ignore, tolerances = [], {}
+            for rule in rules:
+                ignore.extend(p for p in rule.get("ignore", []) if p not in ignore)
+                for pattern, tol in rule.get("tolerances", {}).items():
+                    tolerances.setdefault(pattern, tol)
+            self._compiled[signature] = PathRules(ignore, tolerances)
+        return self._compiled[signature]
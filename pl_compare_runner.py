@@ -0,0 +1,43 @@
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+# -------------------- CONFIG --------------------
+DEFAULT_WORKERS = os.cpu_count() or 1
+WINDOW_PER_WORKER = 4
+
+
+def compare_in_parallel(tasks, worker, workers=None, window=None, progress_every=50):
+    """
+    Run `worker(task)` for every task across a process pool and yield the
+    results in input order.
+
+    tasks:   any iterable (a generator is fine); pulled lazily
+    worker:  top-level (picklable) function; it should load and diff the pair
+             itself so only small task descriptors / result rows cross processes
+    window:  max tasks submitted but not yet yielded - bounds memory no matter
+             how many pairs there are (default: 4 per worker)
+
+    With workers <= 1 everything runs in-process.
+    """
+    workers = workers or DEFAULT_WORKERS
+    if workers <= 1:
+        for done, task in enumerate(tasks, 1):
+            yield worker(task)
+            if progress_every and done % progress_every == 0:
+                print(f"Compared {done} pairs...", end="\r", flush=True)
+        return
+
+    window = window or workers * WINDOW_PER_WORKER
+    pending = deque()
+    done = 0
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        for task in tasks:
+            pending.append(pool.submit(worker, task))
+            if len(pending) >= window:
+                yield pending.popleft().result()
+                done += 1
+                if progress_every and done % progress_every == 0:
+                    print(f"Compared {done} pairs...", end="\r", flush=True)
+        while pending:
+            yield pending.popleft().result()
@@ -2,7 +2,7 @@ import os
 import json
 import asyncio
 from dotenv import load_dotenv, set_key
-from playwright.async_api import async_playwright
+from pl_browser_runner import run_environments
 
 # ----------------------- Load env -----------------------
 load_dotenv()
@@ -26,7 +26,7 @@ def load_config():
 # ----------------------- Extract env URL -----------------------
 async def extract_env_url(page, base_url, system, region, env, urltype, is_source):
     await page.goto(f"{base_url}/#/", wait_until="domcontentloaded")
-    await page.wait_for_timeout(3000)
+    await page.get_by_role("button", name="Select").wait_for(timeout=15000)
 
     print(f"\nNavigating to {env} > {system} > {region} > {urltype}")
 
@@ -71,38 +71,31 @@ async def extract_env_url(page, base_url, system, region, env, urltype, is_sourc
 
 
 # ----------------------- Source + Target -----------------------
-async def process_source(config):
-    print("\n🌍 Processing SOURCE")
-    async with async_playwright() as p:
-        browser = await p.chromium.launch(headless=False)
-        page = await browser.new_page()
-        await extract_env_url(
-            page,
-            SOURCE_BASE_URL,
-            config["System"],
-            config["Region"],
-            config["Env_Source"],
-            config["URLTYPE"],
-            is_source=True
-        )
-        await browser.close()
-
-
-async def process_target(config):
-    print("\n🌍 Processing TARGET")
-    async with async_playwright() as p:
-        browser = await p.chromium.launch(headless=False)
-        page = await browser.new_page()
-        await extract_env_url(
-            page,
-            TARGET_BASE_URL,
-            config["System"],
-            config["Region"],
-            config["Env_Target"],
-            config["URLTYPE"],
-            is_source=False
-        )
-        await browser.close()
+async def process_env(page, label, job):
+    print(f"\n🌍 Processing {label}")
+    base_url, config, env_key, is_source = job
+    return await extract_env_url(
+        page,
+        base_url,
+        config["System"],
+        config["Region"],
+        config[env_key],
+        config["URLTYPE"],
+        is_source=is_source
+    )
+
+
+async def process_source_and_target(config):
+    """SOURCE and TARGET in parallel tabs of one headless browser."""
+    results = await run_environments({
+        "SOURCE": (SOURCE_BASE_URL, config, "Env_Source", True),
+        "TARGET": (TARGET_BASE_URL, config, "Env_Target", False),
+    }, process_env)
+
+    for label, result in results.items():
+        if isinstance(result, Exception):
+            print(f"🔥 {label} failed: {result}")
+    return results
 
 
 # ----------------------- MAIN -----------------------
@@ -110,8 +103,7 @@ async def main():
     config = load_config()
     print(f"\nLoaded config → System: {config['System']} | Region: {config['Region']} | Source: {config['Env_Source']} | Target: {config['Env_Target']}")
 
-    await process_source(config)
-    await process_target(config)
+    await process_source_and_target(config)
 
     print("\n✅ All environments processed successfully!")
 
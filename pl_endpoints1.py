@@ -2,7 +2,10 @@ import os
 import asyncio
 import pandas as pd
 from dotenv import load_dotenv
-from playwright.async_api import async_playwright
+from requests_ntlm import HttpNtlmAuth
+from auth import get_password
+from swagger_spec_extractor import extract_endpoints_from_ui
+from pl_browser_runner import run_environments
 
 # -------------------- CONFIG --------------------
 load_dotenv()
@@ -13,6 +16,8 @@ TARGET_DS = os.getenv("TARGET_DS")
 if not SOURCE_DS or not TARGET_DS:
     raise Exception("SOURCE_DS or TARGET_DS missing in .env")
 
+AUTH = HttpNtlmAuth(os.getenv("USERNAME"), get_password())
+
 OUTPUT_FILE = os.path.join("API", "reports", "endpoints.xlsx")
 
 # Swagger UI selectors
@@ -23,61 +28,92 @@ PATH_SELECTOR = ".opblock-summary-path"
 PARAM_ROW_SELECTOR = "tr"
 PARAM_NAME_SELECTOR = ".parameter__name"
 PARAM_ENUM_SELECTOR = ".parameter__enum"
+TAG_SELECTOR = "h4[id^='operations-tag'] span"
+
+# Expand every collapsed GET block in one round trip; returns the number of GET blocks
+EXPAND_ALL_JS = """
+(sel) => {
+    const blocks = document.querySelectorAll(sel.block);
+    blocks.forEach(b => {
+        if (!b.classList.contains("is-open")) {
+            const summary = b.querySelector(sel.summary);
+            if (summary) summary.click();
+        }
+    });
+    return blocks.length;
+}
+"""
+
+# Read path, tag and every parameter name/enum of all GET blocks in one round trip
+EXTRACT_ALL_JS = """
+(sel) => Array.from(document.querySelectorAll(sel.block)).map(b => {
+    const path = b.querySelector(sel.path);
+    const section = b.closest(".opblock-tag-section");
+    const tag = section ? section.querySelector(sel.tag) : null;
+    const params = [];
+    b.querySelectorAll(sel.row).forEach(r => {
+        const name = r.querySelector(sel.name);
+        if (!name) return;
+        const en = r.querySelector(sel.enumValues);
+        params.push([name.innerText, en ? en.innerText : null]);
+    });
+    return {
+        endpoint: path ? path.innerText : "",
+        tag: tag ? tag.innerText : null,
+        params: params
+    };
+})
+"""
+
+SELECTORS = {
+    "block": GET_BLOCK_SELECTOR,
+    "summary": SUMMARY_SELECTOR,
+    "path": PATH_SELECTOR,
+    "tag": TAG_SELECTOR,
+    "row": PARAM_ROW_SELECTOR,
+    "name": PARAM_NAME_SELECTOR,
+    "enumValues": PARAM_ENUM_SELECTOR,
+}
 
 # -------------------- CORE EXTRACTION --------------------
 async def extract_endpoints(page):
     results = []
 
     # Ensure tags are rendered
-    await page.wait_for_selector("h4[id^='operations-tag'] span", timeout=10000)
-
-    get_blocks = await page.query_selector_all(GET_BLOCK_SELECTOR)
-    print(f"Found {len(get_blocks)} GET endpoints")
-
-    for block in get_blocks:
+    await page.wait_for_selector(TAG_SELECTOR, timeout=10000)
+
+    # Expand all GET blocks at once, then wait until every body has rendered
+    block_count = await page.evaluate(EXPAND_ALL_JS, SELECTORS)
+    print(f"Found {block_count} GET endpoints")
+    try:
+        await page.wait_for_function(
+            "([sel, n]) => document.querySelectorAll(sel + ' .opblock-body').length >= n",
+            arg=[GET_BLOCK_SELECTOR, block_count],
+            timeout=15000
+        )
+    except Exception as e:
+        print(f"Not every GET block expanded, extracting what rendered: {e}")
+
+    # One in-page pass returns every path / tag / parameter as JSON
+    blocks = await page.evaluate(EXTRACT_ALL_JS, SELECTORS)
+
+    for block in blocks:
         try:
-            # Expand GET block
-            await block.click()
-            await page.wait_for_timeout(300)
-
-            # Endpoint path
-            path_el = await block.query_selector(PATH_SELECTOR)
-            endpoint = (await path_el.inner_text()).strip() if path_el else ""
-
-            # -------- TAG EXTRACTION (FIXED) --------
-            tag_el = await block.query_selector(
-                "xpath=ancestor::div[contains(@class,'opblock-tag-section')]"
-                "//h4[contains(@id,'operations-tag')]//span"
-            )
-            tag = (await tag_el.inner_text()).strip() if tag_el else "UNKNOWN"
-
             # -------- PARAMETER EXTRACTION --------
             parameters = {}
-
-            rows = await block.query_selector_all(PARAM_ROW_SELECTOR)
-            for row in rows:
-                name_el = await row.query_selector(PARAM_NAME_SELECTOR)
-                enum_el = await row.query_selector(PARAM_ENUM_SELECTOR)
-
-                if not name_el:
-                    continue
-
-                param_name = (await name_el.inner_text()).strip()
-
-                if enum_el:
-                    values = (
-                        await enum_el.inner_text()
-                    ).replace("Available values:", "").strip()
+            for raw_name, raw_enum in block["params"]:
+                param_name = raw_name.strip()
+                if raw_enum is not None:
+                    values = raw_enum.replace("Available values:", "").strip()
                 else:
                     values = ""
-
                 parameters[param_name] = values
 
             # -------- ROW OUTPUT --------
             row = {
-                "tag": tag,
+                "tag": (block["tag"] or "UNKNOWN").strip(),
                 "method": "GET",
-                "endpoint": endpoint
+                "endpoint": block["endpoint"].strip()
             }
 
             row.update(parameters)
@@ -89,28 +125,54 @@ async def extract_endpoints(page):
     return results
 
 
-async def process_environment(env_name, url):
-    async with async_playwright() as p:
-        browser = await p.chromium.launch(headless=False)
-        context = await browser.new_context()
-        page = await context.new_page()
-
-        print(f"Opening {env_name}: {url}")
-        await page.goto(url)
-        await page.wait_for_timeout(5000)
-
-        data = await extract_endpoints(page)
-
-        await browser.close()
+async def parse_environment_spec(env_name, url):
+    # Parse the spec behind the Swagger UI directly - no browser needed
+    try:
+        data = await asyncio.to_thread(extract_endpoints_from_ui, url, AUTH)
+        print(f"{env_name}: {len(data)} GET endpoints parsed from spec")
         return pd.DataFrame(data)
+    except Exception as e:
+        print(f"{env_name}: spec parsing failed ({e}), falling back to Swagger UI scraping")
+        return None
+
+
+async def scrape_environment(page, env_name, url):
+    print(f"Opening {env_name}: {url}")
+    await page.goto(url, wait_until="domcontentloaded")
+
+    data = await extract_endpoints(page)
+    return pd.DataFrame(data)
+
+
+async def process_environments(environments):
+    """
+    {env_name: swagger_url} -> {env_name: DataFrame}
+    Specs are parsed concurrently; environments without a reachable spec are
+    scraped in parallel tabs of one headless browser.
+    """
+    frames = await asyncio.gather(
+        *(parse_environment_spec(env_name, url) for env_name, url in environments.items())
+    )
+    results = dict(zip(environments.keys(), frames))
+
+    pending = {env_name: environments[env_name] for env_name, df in results.items() if df is None}
+    if pending:
+        scraped = await run_environments(pending, scrape_environment)
+        for env_name, df in scraped.items():
+            if isinstance(df, Exception):
+                print(f"{env_name}: scraping failed: {df}")
+                df = pd.DataFrame()
+            results[env_name] = df
+
+    return results
 
 
 # -------------------- ENTRY POINT --------------------
 async def main():
     os.makedirs(os.path.dirname(OUTPUT_FILE), exist_ok=True)
 
-    source_df = await process_environment("SOURCE", SOURCE_DS)
-    target_df = await process_environment("TARGET", TARGET_DS)
+    frames = await process_environments({"SOURCE": SOURCE_DS, "TARGET": TARGET_DS})
+    source_df, target_df = frames["SOURCE"], frames["TARGET"]
 
     with pd.ExcelWriter(OUTPUT_FILE, engine="openpyxl") as writer:
         source_df.to_excel(writer, sheet_name="SOURCE", index=False)
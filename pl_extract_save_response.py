@@ -5,12 +5,11 @@ import time
 from auth import get_password
 
 import pandas as pd
-import requests
 from dotenv import load_dotenv
 from requests_ntlm import HttpNtlmAuth
 
-import urllib3
-urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
+from pl_response_capture import capture_all, normalise_json_file
+from pl_response_store import ResponseStore
 
 
 load_dotenv()
@@ -26,8 +25,13 @@ APITESTDATA_FILE = "shared/input/ApiTestData.json"
 REPORT_BASE = "shared/reports"
 REPORT_EXTRACT_RESPONSES = os.path.join(REPORT_BASE, "pl_extract_save_responses.xlsx")  # <--- OUTPUT REPORT
 
-# Manually set this for limiting requests (set to None for no limit)
-REQUEST_LIMIT = 10
+# Optional cap for quick runs (unset / 0 = no limit)
+REQUEST_LIMIT = int(os.getenv("REQUEST_LIMIT", "0")) or None
+# Concurrent requests per host (SOURCE and TARGET hosts are limited separately)
+PER_HOST_CONCURRENCY = int(os.getenv("PER_HOST_CONCURRENCY", "8"))
+# Bodies go to the response store; set to 1 to also export pretty-printed
+# copies into Source_json / Target_json for manual inspection
+EXPORT_JSON_FILES = os.getenv("EXPORT_JSON_FILES", "0") == "1"
 
 # =========== BLOCK: Load System Name ===========
 with open(APITESTDATA_FILE, "r") as f:
@@ -36,30 +40,14 @@ SYSTEM = api_testdata.get("System", "UNKNOWN_SYSTEM")
 
 SOURCE_JSON_FOLDER = os.path.join(REPORT_BASE, SYSTEM, "Source_json")
 TARGET_JSON_FOLDER = os.path.join(REPORT_BASE, SYSTEM, "Target_json")
-os.makedirs(SOURCE_JSON_FOLDER, exist_ok=True)
-os.makedirs(TARGET_JSON_FOLDER, exist_ok=True)
+STORE = ResponseStore(os.path.join(REPORT_BASE, SYSTEM, "response_store"))
 
 # =========== BLOCK: Read Test Case Excel ===========
 df = pd.read_excel(INPUT_TESTCASE_FILE)
 if "SourceRequestURL" not in df.columns or "TargetRequestURL" not in df.columns:
     raise Exception("Missing required columns in test case file.")
 
-# =========== BLOCK: Response Extraction ===========
-def save_json_response(url, auth, out_path):
-    """Fetch the API response and save JSON content to out_path"""
-    try:
-        resp = requests.get(url, auth=auth, timeout=30, verify=False)
-        resp.raise_for_status()
-        try:
-            data = resp.json()
-        except Exception:
-            data = resp.text
-        with open(out_path, "w", encoding="utf-8") as f:
-            json.dump(data, f, indent=2, ensure_ascii=False)
-        return True, None
-    except Exception as ex:
-        return False, str(ex)
-
+# =========== BLOCK: Helpers ===========
 def extract_param_string(row, param_cols):
     """Extract parameter string for file naming from row, e.g., tradingEntity_reportingDate"""
     param_values = [str(row.get(col, "")).strip() for col in param_cols]
@@ -74,58 +62,70 @@ def get_param_columns(df):
 def main():
     total_rows = len(df)
     param_cols = get_param_columns(df)
-    processed = 0
     t0 = time.time()
 
-    # --------- Collect rows for reporting ---------
-    report_rows = []
-
+    # --------- Build one SOURCE + TARGET case per test row ---------
+    cases, meta = [], []
     for idx, row in df.iterrows():
-        if REQUEST_LIMIT and processed >= REQUEST_LIMIT:
+        if REQUEST_LIMIT and len(cases) >= REQUEST_LIMIT:
             break
 
         tagname = str(row["TagName"]).strip() if "TagName" in row else "no_tag"
         param_str = extract_param_string(row, param_cols)
-
-        # --- Source API ---
+        case_id = str(row.get("TestCaseID", idx)).strip()
         src_url = str(row["SourceRequestURL"]).strip()
-        src_err = ""
-        if src_url:
-            src_filename = f"{tagname}_{param_str}.json"
-            src_path = os.path.join(SOURCE_JSON_FOLDER, src_filename)
-            success, err = save_json_response(src_url, AUTH, src_path)
-            if not success:
-                print(f"[SOURCE] Error fetching {src_url}: {err}")
-                src_err = err
-
-        # --- Target API ---
         tgt_url = str(row["TargetRequestURL"]).strip()
-        tgt_err = ""
+
+        case = []
+        if src_url:
+            case.append({"case_id": case_id, "env": "SOURCE", "url": src_url,
+                         "path": os.path.join(SOURCE_JSON_FOLDER, f"{tagname}_{param_str}.json")})
         if tgt_url:
-            tgt_filename = f"{tagname}_{param_str}.json"
-            tgt_path = os.path.join(TARGET_JSON_FOLDER, tgt_filename)
-            success, err = save_json_response(tgt_url, AUTH, tgt_path)
-            if not success:
-                print(f"[TARGET] Error fetching {tgt_url}: {err}")
-                tgt_err = err
+            case.append({"case_id": case_id, "env": "TARGET", "url": tgt_url,
+                         "path": os.path.join(TARGET_JSON_FOLDER, f"{tagname}_{param_str}.json")})
+        cases.append(case)
+        meta.append((src_url, tgt_url))
+
+    # --------- Fetch all cases, SOURCE and TARGET concurrently ---------
+    print(f"Capturing {len(cases)}/{total_rows} test cases ({PER_HOST_CONCURRENCY} per host)...")
+    results = capture_all(cases, auth=AUTH, per_host=PER_HOST_CONCURRENCY, store=STORE)
+
+    if EXPORT_JSON_FILES:
+        os.makedirs(SOURCE_JSON_FOLDER, exist_ok=True)
+        os.makedirs(TARGET_JSON_FOLDER, exist_ok=True)
+        for case_results in results:
+            for r in case_results:
+                if r["path"] and not r["error"]:
+                    STORE.export(r["sha256"], r["path"])
+                    normalise_json_file(r["path"])
+
+    # --------- Collect rows for reporting ---------
+    report_rows = []
+    for (src_url, tgt_url), case_results in zip(meta, results):
+        errors = {"SOURCE": "", "TARGET": ""}
+        hashes = {"SOURCE": "", "TARGET": ""}
+        for r in case_results:
+            hashes[r["env"]] = r["sha256"] or ""
+            if r["error"]:
+                print(f"[{r['env']}] Error fetching {r['url']}: {r['error']}")
+                errors[r["env"]] = r["error"]
 
         # Append to report (combine errors for easy debug)
-        if src_err or tgt_err:
-            error_text = f"SOURCE: {src_err}; TARGET: {tgt_err}".strip("; ")
+        if errors["SOURCE"] or errors["TARGET"]:
+            error_text = f"SOURCE: {errors['SOURCE']}; TARGET: {errors['TARGET']}".strip("; ")
         else:
             error_text = ""
 
         report_rows.append({
             "sourcerequestapi": src_url,
             "targetrequestapi": tgt_url,
+            "sourcehash": hashes["SOURCE"],
+            "targethash": hashes["TARGET"],
             "error": error_text
         })
 
-        processed += 1
-        print(f"Processed {processed}/{total_rows} test cases...", end="\r", flush=True)
-
     t1 = time.time()
-    print(f"\nTotal time taken: {t1-t0:.2f} seconds. Processed {processed} testcases.")
+    print(f"\nTotal time taken: {t1-t0:.2f} seconds. Processed {len(results)} testcases.")
 
     # --------- Write report to Excel ---------
     report_df = pd.DataFrame(report_rows)
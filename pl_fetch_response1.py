@@ -5,12 +5,11 @@ import time
 from auth import get_password
 
 import pandas as pd
-import requests
 from dotenv import load_dotenv
 from requests_ntlm import HttpNtlmAuth
 
-import urllib3
-urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
+from pl_response_capture import capture_all, normalise_json_file
+from pl_response_store import ResponseStore
 
 load_dotenv()
 
@@ -25,7 +24,13 @@ APITESTDATA_FILE = "shared/input/ApiTestData.json"
 REPORT_BASE = "shared/reports"
 REPORT_EXTRACT_RESPONSES = os.path.join(REPORT_BASE, "pl_extract_save_responses.xlsx")
 
-REQUEST_LIMIT = 10
+# Optional cap for quick runs (unset / 0 = full regression pass)
+REQUEST_LIMIT = int(os.getenv("REQUEST_LIMIT", "0")) or None
+# Concurrent requests per host (SOURCE and TARGET hosts are limited separately)
+PER_HOST_CONCURRENCY = int(os.getenv("PER_HOST_CONCURRENCY", "8"))
+# Bodies go to the response store; set to 1 to also export pretty-printed
+# copies into Source_json / Target_json for manual inspection
+EXPORT_JSON_FILES = os.getenv("EXPORT_JSON_FILES", "0") == "1"
 
 # =========== BLOCK: Load System Name ===========
 with open(APITESTDATA_FILE, "r") as f:
@@ -34,8 +39,7 @@ SYSTEM = api_testdata.get("System", "UNKNOWN_SYSTEM")
 
 SOURCE_JSON_FOLDER = os.path.join(REPORT_BASE, SYSTEM, "Source_json")
 TARGET_JSON_FOLDER = os.path.join(REPORT_BASE, SYSTEM, "Target_json")
-os.makedirs(SOURCE_JSON_FOLDER, exist_ok=True)
-os.makedirs(TARGET_JSON_FOLDER, exist_ok=True)
+STORE = ResponseStore(os.path.join(REPORT_BASE, SYSTEM, "response_store"))
 
 # =========== BLOCK: Read Test Case Excel ===========
 df = pd.read_excel(INPUT_TESTCASE_FILE)
@@ -43,20 +47,6 @@ if "SourceRequestURL" not in df.columns or "TargetRequestURL" not in df.columns:
     raise Exception("Missing required columns in test case file.")
 
 # =========== BLOCK: Helpers ===========
-def save_json_response(url, auth, out_path):
-    try:
-        resp = requests.get(url, auth=auth, timeout=30, verify=False)
-        resp.raise_for_status()
-        try:
-            data = resp.json()
-        except Exception:
-            data = resp.text
-        with open(out_path, "w", encoding="utf-8") as f:
-            json.dump(data, f, indent=2, ensure_ascii=False)
-        return True, None
-    except Exception as ex:
-        return False, str(ex)
-
 def extract_param_string(row, param_cols):
     param_values = [str(row.get(col, "")).strip() for col in param_cols]
     filtered_params = [v for v in param_values if v]
@@ -82,44 +72,65 @@ def expand_urls(raw_url):
     values = [v.strip() for v in tail.split(",") if v.strip()]
     return [f"{base}/{v}" for v in values]
 
+# =========== BLOCK: Build Capture Cases ===========
+def build_cases(df, param_cols):
+    """One case per test row: every expanded SOURCE and TARGET URL, fetched together."""
+    cases, meta = [], []
+    for idx, row in df.iterrows():
+        if REQUEST_LIMIT and len(cases) >= REQUEST_LIMIT:
+            break
+
+        tagname = str(row["TagName"]).strip() if "TagName" in row else "no_tag"
+        param_str = extract_param_string(row, param_cols)
+        case_id = str(row.get("TestCaseID", idx)).strip()
+        src_url_raw = str(row["SourceRequestURL"]).strip()
+        tgt_url_raw = str(row["TargetRequestURL"]).strip()
+
+        expanded = {
+            "SOURCE": expand_urls(src_url_raw) if src_url_raw else [],
+            "TARGET": expand_urls(tgt_url_raw) if tgt_url_raw else [],
+        }
+        # A row expanding to several URLs gets one id per position (SOURCE i
+        # pairs with TARGET i), so the store index keeps every one of them
+        multiple = max(len(urls) for urls in expanded.values()) > 1
+
+        case = []
+        for env, folder in (("SOURCE", SOURCE_JSON_FOLDER), ("TARGET", TARGET_JSON_FOLDER)):
+            for i, url in enumerate(expanded[env], start=1):
+                case.append({
+                    "case_id": f"{case_id}_{i}" if multiple else case_id,
+                    "env": env,
+                    "url": url,
+                    "path": os.path.join(folder, f"{tagname}_{param_str}_{i}.json"),
+                })
+
+        cases.append(case)
+        meta.append((src_url_raw, tgt_url_raw))
+    return cases, meta
+
 # =========== BLOCK: Main ===========
 def main():
     total_rows = len(df)
     param_cols = get_param_columns(df)
-    processed = 0
     t0 = time.time()
 
-    report_rows = []
+    cases, meta = build_cases(df, param_cols)
+    print(f"Capturing {len(cases)}/{total_rows} testcases ({PER_HOST_CONCURRENCY} per host)...")
+    results = capture_all(cases, auth=AUTH, per_host=PER_HOST_CONCURRENCY, store=STORE)
 
-    for idx, row in df.iterrows():
-        if REQUEST_LIMIT and processed >= REQUEST_LIMIT:
-            break
-
-        tagname = str(row["TagName"]).strip() if "TagName" in row else "no_tag"
-        param_str = extract_param_string(row, param_cols)
+    if EXPORT_JSON_FILES:
+        os.makedirs(SOURCE_JSON_FOLDER, exist_ok=True)
+        os.makedirs(TARGET_JSON_FOLDER, exist_ok=True)
+        for case_results in results:
+            for r in case_results:
+                if r["path"] and not r["error"]:
+                    STORE.export(r["sha256"], r["path"])
+                    normalise_json_file(r["path"])
 
-        src_err = ""
-        tgt_err = ""
-
-        # -------- SOURCE --------
-        src_url_raw = str(row["SourceRequestURL"]).strip()
-        if src_url_raw:
-            for i, src_url in enumerate(expand_urls(src_url_raw), start=1):
-                src_filename = f"{tagname}_{param_str}_{i}.json"
-                src_path = os.path.join(SOURCE_JSON_FOLDER, src_filename)
-                success, err = save_json_response(src_url, AUTH, src_path)
-                if not success:
-                    src_err += f"[{src_url}] {err} | "
-
-        # -------- TARGET --------
-        tgt_url_raw = str(row["TargetRequestURL"]).strip()
-        if tgt_url_raw:
-            for i, tgt_url in enumerate(expand_urls(tgt_url_raw), start=1):
-                tgt_filename = f"{tagname}_{param_str}_{i}.json"
-                tgt_path = os.path.join(TARGET_JSON_FOLDER, tgt_filename)
-                success, err = save_json_response(tgt_url, AUTH, tgt_path)
-                if not success:
-                    tgt_err += f"[{tgt_url}] {err} | "
+    report_rows = []
+    for (src_url_raw, tgt_url_raw), case_results in zip(meta, results):
+        src_err = "".join(f"[{r['url']}] {r['error']} | " for r in case_results if r["env"] == "SOURCE" and r["error"])
+        tgt_err = "".join(f"[{r['url']}] {r['error']} | " for r in case_results if r["env"] == "TARGET" and r["error"])
 
         error_text = ""
         if src_err or tgt_err:
@@ -128,14 +139,13 @@ def main():
         report_rows.append({
             "sourcerequestapi": src_url_raw,
             "targetrequestapi": tgt_url_raw,
+            "sourcehash": "|".join(r["sha256"] or "" for r in case_results if r["env"] == "SOURCE"),
+            "targethash": "|".join(r["sha256"] or "" for r in case_results if r["env"] == "TARGET"),
             "error": error_text
         })
 
-        processed += 1
-        print(f"Processed {processed}/{total_rows}", end="\r", flush=True)
-
     t1 = time.time()
-    print(f"\nTotal time taken: {t1 - t0:.2f}s. Processed {processed} testcases.")
+    print(f"\nTotal time taken: {t1 - t0:.2f}s. Processed {len(results)} testcases.")
 
     report_df = pd.DataFrame(report_rows)
     report_df.to_excel(REPORT_EXTRACT_RESPONSES, index=False)
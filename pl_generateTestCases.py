@@ -2,16 +2,15 @@ import os
 import sys
 import json
 import time
+import shutil
 import subprocess
 import pandas as pd
-import requests
 from dotenv import load_dotenv
 from requests_ntlm import HttpNtlmAuth
 from auth import get_password
-import urllib3
 from unicodedata import normalize
-
-urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
+from pl_http import SessionPool, sso_auth
+from pl_response_capture import stream_to_file
 
 # ------------------------- LOAD ENV -------------------------
 load_dotenv()
@@ -20,6 +19,9 @@ PASSWORD = get_password()
 if not USERNAME or not PASSWORD:
     raise Exception("Missing USERNAME or PASSWORD")
 AUTH = HttpNtlmAuth(USERNAME, PASSWORD)
+# Hosts that reject the NTLM credentials (401) are retried with negotiate as
+# the logged-on user (SPNEGO via SSPI / Kerberos) on the same pooled sessions
+POOL = SessionPool(AUTH, per_host=1, fallback_auth=sso_auth())
 
 # ------------------------- PATHS ----------------------------
 INPUT_TESTCASE_FILE = "shared/reports/pl_testcases.xlsx"
@@ -39,33 +41,46 @@ os.makedirs(TARGET_JSON_FOLDER, exist_ok=True)
 def clean_url(url):
     return normalize("NFKC", str(url)).replace("\u00A0", "").replace("\u200B", "").strip()
 
-# -------------------- TRY REQUESTS --------------------------
-def try_requests_first(url, out_file):
+# -------------------- FETCH -------------------------------
+def fetch_to_file(url, out_file):
+    """Streams one response to `out_file` over a pooled keep-alive session. Returns (method, error)."""
     try:
-        headers = {"Accept": "application/json"}
-        r = requests.get(url, auth=AUTH, headers=headers, timeout=30, verify=False)
-        r.raise_for_status()
-        with open(out_file, "w", encoding="utf-8") as f:
-            json.dump(r.json(), f, indent=2)
-        return "requests_success", None
+        with POOL.get(url, timeout=30, stream=True) as r:
+            r.raise_for_status()
+            stream_to_file(r, out_file)
+        return ("sso_success" if POOL.uses_fallback(url) else "requests_success"), None
     except Exception as ex:
-        return "fallback_to_curl", str(ex)
+        return "request_failed", str(ex)
 
 # -------------------- TRY CURL ------------------------------
 def try_curl(url, out_file):
+    """Last resort, as before the pooled sessions: curl negotiates as the logged-on user."""
+    if shutil.which("curl") is None:
+        return "curl_unavailable", "curl not found"
     try:
-        cmd = f'curl -s --ntlm --negotiate -u : "{url}"'
-        result = subprocess.run(cmd, shell=True, capture_output=True, text=True)
+        result = subprocess.run(["curl", "-s", "--ntlm", "--negotiate", "-u", ":", url],
+                                capture_output=True, text=True)
         if result.returncode == 0:
             with open(out_file, "w", encoding="utf-8") as f:
                 f.write(result.stdout)
             return "curl_success", None
-        else:
-            return "curl_failed", result.stderr.strip()
+        return "curl_failed", result.stderr.strip()
     except Exception as e:
         return "curl_exception", str(e)
 
+def fetch_with_fallback(url, out_file):
+    method, error = fetch_to_file(url, out_file)
+    if method not in SUCCESS:
+        curl_method, curl_error = try_curl(url, out_file)
+        if curl_method == "curl_success":
+            return curl_method, None
+        error = f"{error}; curl: {curl_error}"
+    return method, error
+
 # -------------------- MAIN LOOP -----------------------------
+SUCCESS = ("requests_success", "sso_success", "curl_success")
+
+
 def main():
     df = pd.read_excel(INPUT_TESTCASE_FILE)
     if "SourceRequestURL" not in df.columns or "TargetRequestURL" not in df.columns:
@@ -83,16 +98,11 @@ def main():
         src_outfile = os.path.join(SOURCE_JSON_FOLDER, f"{tagname}_{param_str}.json")
         tgt_outfile = os.path.join(TARGET_JSON_FOLDER, f"{tagname}_{param_str}.json")
 
-        src_method, src_error = try_requests_first(source_url, src_outfile)
-        if src_method == "fallback_to_curl":
-            src_method, src_error = try_curl(source_url, src_outfile)
-
-        tgt_method, tgt_error = try_requests_first(target_url, tgt_outfile)
-        if tgt_method == "fallback_to_curl":
-            tgt_method, tgt_error = try_curl(target_url, tgt_outfile)
+        src_method, src_error = fetch_with_fallback(source_url, src_outfile)
+        tgt_method, tgt_error = fetch_with_fallback(target_url, tgt_outfile)
 
         result = "FETCHED"
-        if src_method not in ["requests_success", "curl_success"] or tgt_method not in ["requests_success", "curl_success"]:
+        if src_method not in SUCCESS or tgt_method not in SUCCESS:
             result = f"SRC: {src_error or src_method}; TGT: {tgt_error or tgt_method}"
 
         report_rows.append({
@@ -102,6 +112,7 @@ def main():
             "result": result
         })
 
+    POOL.close()
     df_out = pd.DataFrame(report_rows)
     df_out.to_excel(REPORT_EXTRACT_RESPONSES, index=False)
     print(f"✅ Extraction complete. Report saved to: {REPORT_EXTRACT_RESPONSES}")
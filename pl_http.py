@@ -0,0 +1,316 @@
+import os
+import json
+import time
+import queue
+import socket
+import threading
+from contextlib import contextmanager
+from urllib.parse import urlparse
+
+import requests
+from requests.adapters import HTTPAdapter
+from requests.auth import HTTPBasicAuth
+import urllib3
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+
+urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
+
+# -------------------- CONFIG --------------------
+DEFAULT_PER_HOST = 8
+DEFAULT_HEADERS = {"Accept": "application/json"}
+XML_HEADERS = {"Accept": "application/xml", "Content-Type": "application/xml"}
+
+# Offline replay: JSON file of {original origin: mock origin} written by
+# pl_mock_server; when set, every session sends its requests to the mock instead
+MOCK_HOSTS_FILE = os.getenv("PL_MOCK_HOSTS")
+# Request / response headers never written to the capture log: credentials,
+# session cookies and NTLM / Negotiate challenge tokens
+SECRET_HEADERS = {"authorization", "proxy-authorization", "cookie",
+                  "set-cookie", "www-authenticate", "proxy-authenticate"}
+
+
+# -------------------- AUTH --------------------
+_sso_warned = False
+
+
+def sso_auth():
+    """
+    Negotiate (Kerberos / NTLM) with the logged-on user's credentials - what
+    `curl --ntlm --negotiate -u :` does. Needs one optional package:
+    requests-negotiate-sspi (Windows) or requests-kerberos (elsewhere).
+    Without either it returns None and warns once; callers that used curl
+    before (pl_generateTestCases) fall back to it.
+    """
+    global _sso_warned
+    try:
+        from requests_negotiate_sspi import HttpNegotiateAuth
+        return HttpNegotiateAuth()
+    except ImportError:
+        pass
+    try:
+        from requests_kerberos import HTTPKerberosAuth, OPTIONAL
+        return HTTPKerberosAuth(mutual_authentication=OPTIONAL)
+    except ImportError:
+        pass
+    if not _sso_warned:
+        _sso_warned = True
+        print("⚠️ SSO fallback disabled: pip install requests-negotiate-sspi (Windows) "
+              "or requests-kerberos to retry 401s as the logged-on user")
+    return None
+
+
+def user_auth(username, password, scheme="ntlm"):
+    """Explicit credentials: "ntlm" (curl --ntlm -u user:pass) or "basic" (plain curl -u user:pass)."""
+    if scheme == "basic":
+        return HTTPBasicAuth(username, password)
+    from requests_ntlm import HttpNtlmAuth
+    return HttpNtlmAuth(username, password)
+
+
+# -------------------- TIMING --------------------
+_timing = threading.local()
+
+
+def new_timing():
+    """Per-request timing record, in seconds; dns / connect / tls stay 0 on a reused connection."""
+    return {"dns": 0.0, "connect": 0.0, "tls": 0.0, "ttfb": None, "total": None, "new_connections": 0}
+
+
+@contextmanager
+def timed():
+    """
+    Collect connection timings for requests this thread sends inside the block
+    (sessions from new_session only). DNS, TCP connect and TLS handshake are
+    measured where urllib3 opens the connection. The caller fills in "ttfb"
+    (headers received) and "total" (body read).
+    """
+    previous = getattr(_timing, "current", None)
+    _timing.current = stats = new_timing()
+    try:
+        yield stats
+    finally:
+        _timing.current = previous
+
+
+class _TimedConnectionMixin:
+    def _new_conn(self):
+        stats = getattr(_timing, "current", None)
+        if stats is None:
+            return super()._new_conn()
+        host = self._dns_host
+        t0 = time.perf_counter()
+        try:
+            addresses = {info[4][0] for info in socket.getaddrinfo(host, self.port, 0, socket.SOCK_STREAM)}
+        except OSError:
+            addresses = set()  # let urllib3 raise its own resolution error
+        t1 = time.perf_counter()
+        stats["dns"] += t1 - t0
+        # Connect to the address just resolved so the lookup is not timed twice;
+        # with several addresses urllib3 resolves again and tries them in turn
+        if len(addresses) == 1:
+            self._dns_host = addresses.pop()
+        try:
+            sock = super()._new_conn()
+        finally:
+            self._dns_host = host
+        stats["connect"] += time.perf_counter() - t1
+        stats["new_connections"] += 1
+        return sock
+
+
+class _TimedHTTPConnection(_TimedConnectionMixin, HTTPConnection):
+    pass
+
+
+class _TimedHTTPSConnection(_TimedConnectionMixin, HTTPSConnection):
+    def connect(self):
+        stats = getattr(_timing, "current", None)
+        if stats is None:
+            return super().connect()
+        before = stats["dns"] + stats["connect"]
+        t0 = time.perf_counter()
+        super().connect()
+        # Whatever connect() spent beyond DNS + TCP is the TLS handshake
+        stats["tls"] += (time.perf_counter() - t0) - (stats["dns"] + stats["connect"] - before)
+
+
+class _TimedHTTPConnectionPool(HTTPConnectionPool):
+    ConnectionCls = _TimedHTTPConnection
+
+
+class _TimedHTTPSConnectionPool(HTTPSConnectionPool):
+    ConnectionCls = _TimedHTTPSConnection
+
+
+class TimingAdapter(HTTPAdapter):
+    """
+    HTTPAdapter whose connections report DNS / connect / TLS time to timed().
+    With PL_MOCK_HOSTS set it also redirects requests to pl_mock_server.
+    """
+
+    def send(self, request, *args, **kwargs):
+        if MOCK_HOSTS:
+            request.url = mock_url(request.url)
+        return super().send(request, *args, **kwargs)
+
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {
+            "http": _TimedHTTPConnectionPool,
+            "https": _TimedHTTPSConnectionPool,
+        }
+
+
+# -------------------- HELPERS --------------------
+def host_of(url):
+    """scheme://host:port - the unit connections (and NTLM handshakes) are pooled by."""
+    parts = urlparse(url)
+    return f"{parts.scheme}://{parts.netloc}".lower()
+
+
+def _load_mock_hosts(path):
+    if not path:
+        return {}
+    with open(path, "r", encoding="utf-8") as f:
+        return {origin.lower(): mock for origin, mock in json.load(f).items()}
+
+
+MOCK_HOSTS = _load_mock_hosts(MOCK_HOSTS_FILE)
+
+
+def mock_url(url):
+    """`url` with its origin swapped for the mock server's (unchanged if it was not recorded)."""
+    mock = MOCK_HOSTS.get(host_of(url))
+    return mock + url[len(host_of(url)):] if mock else url
+
+
+def loggable_headers(headers):
+    """Request or response headers as a plain dict for the capture log, credentials left out."""
+    return {k: v for k, v in headers.items() if k.lower() not in SECRET_HEADERS}
+
+
+def new_session(auth=None, pool_size=1, headers=None, verify=False):
+    """
+    Keep-alive session for one worker slot.
+    NTLM authenticates the TCP connection, so reusing the session reuses the
+    handshake instead of paying it again on every request. `verify` defaults
+    to False like the capture scripts' requests calls; with True a corporate
+    CA bundle can be given through REQUESTS_CA_BUNDLE.
+    """
+    session = requests.Session()
+    session.auth = auth
+    session.verify = verify
+    session.headers.update(headers or DEFAULT_HEADERS)
+    adapter = TimingAdapter(pool_connections=1, pool_maxsize=pool_size, max_retries=0)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+_shared_sessions = {}
+_shared_lock = threading.Lock()
+
+
+def shared_session(username, password, scheme="ntlm", headers=None, verify=True):
+    """
+    One keep-alive session per (user, scheme, headers, verify) for the life of
+    the process - for scripts that call the same service in a loop (the CDW
+    lookups) instead of a new connection and handshake per call. Certificates
+    are verified by default, as the curl calls these replaced did.
+    """
+    key = (username, scheme, tuple(sorted((headers or DEFAULT_HEADERS).items())), verify)
+    with _shared_lock:
+        if key not in _shared_sessions:
+            _shared_sessions[key] = new_session(user_auth(username, password, scheme), headers=headers,
+                                                verify=verify)
+        return _shared_sessions[key]
+
+
+# -------------------- SESSION POOL --------------------
+class SessionPool:
+    """
+    Per-host pool of authenticated sessions, at most `per_host` per host
+    (overridable per host via `host_limits`). Borrow with `with pool.session(url)`,
+    or send a request with `with pool.get(url, ...) as resp` / `pool.request(method, url, ...)`.
+
+    With `fallback_auth` (e.g. sso_auth()), a 401 from the primary auth is
+    retried once with the fallback, using a second keep-alive pool for that
+    host; after one such switch the host goes straight to the fallback.
+    """
+
+    def __init__(self, auth=None, per_host=DEFAULT_PER_HOST, host_limits=None, headers=None,
+                 fallback_auth=None):
+        self.auth = auth
+        self.fallback_auth = fallback_auth
+        self.per_host = per_host
+        self.host_limits = {k.lower(): v for k, v in (host_limits or {}).items()}
+        self.headers = headers
+        self._idle = {}
+        self._created = {}
+        self._fallback_hosts = set()
+        self._lock = threading.Lock()
+
+    def limit(self, host):
+        return self.host_limits.get(host, self.per_host)
+
+    def acquire(self, host, fallback=False):
+        key = (host, fallback)
+        with self._lock:
+            idle = self._idle.setdefault(key, queue.LifoQueue())
+            if idle.empty() and self._created.get(key, 0) < self.limit(host):
+                self._created[key] = self._created.get(key, 0) + 1
+                auth = self.fallback_auth if fallback else self.auth
+                return new_session(auth, headers=self.headers)
+        return idle.get()
+
+    def release(self, host, session, fallback=False):
+        self._idle[(host, fallback)].put(session)
+
+    @contextmanager
+    def session(self, url, fallback=False):
+        host = host_of(url)
+        session = self.acquire(host, fallback)
+        try:
+            yield session
+        finally:
+            self.release(host, session, fallback)
+
+    def uses_fallback(self, url):
+        """True once `url`'s host has switched to fallback_auth."""
+        return host_of(url) in self._fallback_hosts
+
+    @contextmanager
+    def request(self, method, url, **kwargs):
+        """
+        Send `method` through a pooled session, falling back to `fallback_auth`
+        on 401. The session stays borrowed until the block exits, so a
+        streamed body is read over the same (already authenticated) connection.
+        """
+        host = host_of(url)
+        use_fallback = self.fallback_auth is not None and host in self._fallback_hosts
+        with self.session(url, fallback=use_fallback) as session:
+            resp = session.request(method, url, **kwargs)
+            if resp.status_code != 401 or use_fallback or self.fallback_auth is None:
+                with resp:
+                    yield resp
+                return
+            resp.close()
+        with self.session(url, fallback=True) as session:
+            resp = session.request(method, url, **kwargs)
+            if resp.status_code != 401:
+                self._fallback_hosts.add(host)
+            with resp:
+                yield resp
+
+    def get(self, url, **kwargs):
+        """GET through request(); use as `with pool.get(url, ...) as resp`."""
+        return self.request("GET", url, **kwargs)
+
+    def close(self):
+        with self._lock:
+            for idle in self._idle.values():
+                while not idle.empty():
+                    idle.get().close()
+            self._idle.clear()
+            self._created.clear()
@@ -0,0 +1,303 @@
+import re
+import json
+import hashlib
+
+from deepdiff import DeepDiff
+
+from pl_compare_rules import is_number
+
+# -------------------- CONFIG --------------------
+DIGEST_SIZE = 16
+# Scalars up to this many bytes are used as-is instead of being hashed
+SCALAR_INLINE = 64
+INDEX_PATH = re.compile(r"^root\[(\d+)\](.*)$", re.DOTALL)
+
+
+# -------------------- CANONICAL HASH --------------------
+def _digest(data):
+    return hashlib.blake2b(data, digest_size=DIGEST_SIZE).digest()
+
+
+def _token(data):
+    """Length-prefixed so concatenated tokens can never run into each other."""
+    return len(data).to_bytes(4, "big") + data
+
+
+def _hash(node, memo, ignore_order):
+    """
+    Canonical token of a parsed JSON value: dict keys are sorted and, with
+    `ignore_order`, list items are hashed as a multiset (sorted child tokens).
+    Containers get a fixed-size digest, memoised by id() so the diff can reuse
+    it; short scalars are their own (type-tagged) token, which saves a hash
+    call per leaf.
+    """
+    if isinstance(node, dict):
+        key = id(node)
+        if key not in memo:
+            parts = []
+            for k in sorted(node, key=str):
+                k_token = memo.get(("key", k))
+                if k_token is None:
+                    k_token = memo[("key", k)] = _token(repr(k).encode("utf-8", "surrogatepass"))
+                parts.append(k_token)
+                parts.append(_token(_hash(node[k], memo, ignore_order)))
+            memo[key] = _digest(b"{" + b"".join(parts))
+        return memo[key]
+    if isinstance(node, list):
+        key = id(node)
+        if key not in memo:
+            children = [_token(_hash(item, memo, ignore_order)) for item in node]
+            if ignore_order:
+                children.sort()
+            memo[key] = _digest(b"[" + b"".join(children))
+        return memo[key]
+    # Scalars: type name keeps 1 / 1.0 / true apart, like DeepDiff does
+    data = f"{type(node).__name__}:{node!r}".encode("utf-8", "surrogatepass")
+    return data if len(data) <= SCALAR_INLINE else _digest(data)
+
+
+def canonical_hash(data, ignore_order=True):
+    """Hex digest equal for JSON values DeepDiff(ignore_order=...) would call equal."""
+    return _hash(data, {}, ignore_order).hex()
+
+
+# -------------------- SUBTREE DIFF --------------------
+def _merge(report, diff, prefix, index_map=None):
+    """Folds a DeepDiff text-view result into `report`, re-rooting its paths at `prefix`."""
+    def rewrite(path):
+        if index_map is not None:
+            m = INDEX_PATH.match(path)
+            if m:
+                return f"{prefix}[{index_map[int(m.group(1))]}]{m.group(2)}"
+        return prefix + path[len("root"):]
+
+    for report_type, items in diff.items():
+        if hasattr(items, "items"):
+            bucket = report.setdefault(report_type, {})
+            for path, detail in items.items():
+                bucket[rewrite(path)] = detail
+        else:
+            report.setdefault(report_type, []).extend(rewrite(path) for path in items)
+
+
+class _Differ:
+    """
+    One diff run: shared digest memo and report, plus the options every
+    subtree comparison needs.
+
+    keys:  key-field sets for arrays of records, e.g. [["tradeId"], ["book", "positionId"]].
+           A list whose items are all dicts carrying every field of a set is
+           aligned record-by-record on those fields (hash join, linear time)
+           instead of ignore_order matching.
+    rules: pl_compare_rules.PathRules - ignored subtrees are pruned before the
+           walk, numeric tolerances are applied where leaves differ. The walk
+           carries the rule state along and drops it once no rule can match.
+    """
+
+    def __init__(self, ignore_order=True, keys=None, rules=None, deepdiff_kwargs=None):
+        self.ignore_order = ignore_order
+        self.keys = [tuple(k) for k in (keys or [])]
+        self.rules = rules if rules is not None and not rules.empty else None
+        self.deepdiff_kwargs = deepdiff_kwargs or {}
+        self.memo = {}
+        self.report = {}
+
+    def digest(self, node):
+        return _hash(node, self.memo, self.ignore_order)
+
+    def step(self, state, segment):
+        return self.rules.step(state, segment) if state else None
+
+    def add(self, report_type, path, detail=None):
+        self.report.setdefault(report_type, {})[path] = detail
+
+    def deepdiff(self, src, tgt, prefix, index_map=None, index_map_added=None):
+        diff = DeepDiff(src, tgt, ignore_order=self.ignore_order, **self.deepdiff_kwargs)
+        for report_type, items in diff.items():
+            mapping = index_map_added if report_type == "iterable_item_added" else index_map
+            _merge(self.report, {report_type: items}, prefix, mapping)
+
+    def close(self, src, tgt, state):
+        """Equal, allowing for the numeric tolerances that apply under `state`."""
+        if self.digest(src) == self.digest(tgt):
+            return True
+        if not state:
+            return False
+        if is_number(src) and is_number(tgt):
+            return self.rules.numbers_equal(state, src, tgt)
+        if isinstance(src, dict) and isinstance(tgt, dict):
+            return src.keys() == tgt.keys() and all(
+                self.close(src[k], tgt[k], self.step(state, k)) for k in src
+            )
+        if isinstance(src, list) and isinstance(tgt, list) and len(src) == len(tgt):
+            if not self.ignore_order:
+                return all(self.close(a, b, self.step(state, i)) for i, (a, b) in enumerate(zip(src, tgt)))
+            return not self.pair_close(src, tgt, list(range(len(src))), list(range(len(tgt))), state)[0]
+        return False
+
+    def pair_close(self, src, tgt, src_left, tgt_left, state):
+        """Greedily pairs leftover items that are equal within tolerance; returns what stays unpaired."""
+        tgt_free = list(tgt_left)
+        src_rest = []
+        for i in src_left:
+            child = self.step(state, i)
+            j = next((j for j in tgt_free if self.close(src[i], tgt[j], child)), None)
+            if j is None:
+                src_rest.append(i)
+            else:
+                tgt_free.remove(j)
+        return src_rest, tgt_free
+
+    # ---------- nodes ----------
+    def node(self, src, tgt, prefix, state=None):
+        if self.digest(src) == self.digest(tgt):
+            return
+        if isinstance(src, dict) and isinstance(tgt, dict):
+            self.dicts(src, tgt, prefix, state)
+        elif isinstance(src, list) and isinstance(tgt, list):
+            key_fields = self.record_keys(src, tgt)
+            if key_fields:
+                self.records(src, tgt, prefix, key_fields, state)
+            elif self.ignore_order:
+                self.unordered(src, tgt, prefix, state)
+            else:
+                self.ordered(src, tgt, prefix, state)
+        elif state and is_number(src) and is_number(tgt) and self.rules.numbers_equal(state, src, tgt):
+            return
+        else:
+            # Scalars or a type change: hand the (small) pair to DeepDiff
+            self.deepdiff(src, tgt, prefix)
+
+    def dicts(self, src, tgt, prefix, state):
+        for k in src:
+            path = f"{prefix}[{k!r}]"
+            if k not in tgt:
+                self.report.setdefault("dictionary_item_removed", []).append(path)
+            else:
+                self.node(src[k], tgt[k], path, self.step(state, k))
+        for k in tgt:
+            if k not in src:
+                self.report.setdefault("dictionary_item_added", []).append(f"{prefix}[{k!r}]")
+
+    def unordered(self, src, tgt, prefix, state):
+        # Cancel out items present on both sides; only the leftovers go to DeepDiff
+        pending = {}
+        for i, item in enumerate(tgt):
+            pending.setdefault(self.digest(item), []).append(i)
+        src_left = []
+        for i, item in enumerate(src):
+            matches = pending.get(self.digest(item))
+            if matches:
+                matches.pop(0)
+            else:
+                src_left.append(i)
+        tgt_left = sorted(i for idx in pending.values() for i in idx)
+        if state and src_left and tgt_left:
+            # Items that differ only within tolerance cancel out too
+            src_left, tgt_left = self.pair_close(src, tgt, src_left, tgt_left, state)
+        # DeepDiff's ignore_order reports identical leftovers once: hand it one
+        # of each and report the extra copies here, so none goes missing
+        src_left = self.repeats(src, src_left, "iterable_item_removed", prefix)
+        tgt_left = self.repeats(tgt, tgt_left, "iterable_item_added", prefix)
+        if not src_left and not tgt_left:
+            return
+        # Added items are indexed into the target list, everything else into the source
+        self.deepdiff([src[i] for i in src_left], [tgt[i] for i in tgt_left], prefix,
+                      index_map=src_left, index_map_added=tgt_left)
+
+    def repeats(self, items, indices, report_type, prefix):
+        """Indices of the first copy of each distinct item; later copies are reported as `report_type`."""
+        seen, first = set(), []
+        for i in indices:
+            digest = self.digest(items[i])
+            if digest in seen:
+                self.add(report_type, f"{prefix}[{i}]", items[i])
+            else:
+                seen.add(digest)
+                first.append(i)
+        return first
+
+    def ordered(self, src, tgt, prefix, state):
+        for i in range(min(len(src), len(tgt))):
+            self.node(src[i], tgt[i], f"{prefix}[{i}]", self.step(state, i))
+        for i in range(len(tgt), len(src)):
+            self.add("iterable_item_removed", f"{prefix}[{i}]", src[i])
+        for i in range(len(src), len(tgt)):
+            self.add("iterable_item_added", f"{prefix}[{i}]", tgt[i])
+
+    # ---------- arrays of records ----------
+    def record_keys(self, src, tgt):
+        """First configured key set carried by every record on both sides, else None."""
+        if not self.keys or not src or not tgt:
+            return None
+        for key_fields in self.keys:
+            if all(isinstance(r, dict) and all(k in r for k in key_fields) for r in src) and \
+               all(isinstance(r, dict) and all(k in r for k in key_fields) for r in tgt):
+                return key_fields
+        return None
+
+    def records(self, src, tgt, prefix, key_fields, state):
+        """
+        Hash join on the key fields: one pass to index the target, one pass over
+        the source. Matching records are diffed field by field; records without
+        a partner are reported as removed / added. Paths use the record key,
+        e.g. root[tradeId=42]['price'].
+        Keys must be unique on both sides; if either side repeats one, the
+        list is diffed like any other list instead, so no record is lost.
+        """
+        def record_key(record):
+            values = tuple(record[k] for k in key_fields)
+            try:
+                hash(values)
+                return values
+            except TypeError:
+                # Object / array key values: fall back to their JSON text
+                return tuple(json.dumps(v, sort_keys=True) for v in values)
+
+        def label(key):
+            return prefix + "[" + ",".join(f"{f}={v}" for f, v in zip(key_fields, key)) + "]"
+
+        index = {}
+        for record in tgt:
+            key = record_key(record)
+            if key in index:
+                return self.unkeyed(src, tgt, prefix, state)
+            index[key] = record
+        src_keys = [record_key(record) for record in src]
+        if len(set(src_keys)) != len(src_keys):
+            return self.unkeyed(src, tgt, prefix, state)
+
+        for i, (key, record) in enumerate(zip(src_keys, src)):
+            match = index.pop(key, None)
+            if match is None:
+                self.add("record_removed", label(key), record)
+            elif self.digest(record) != self.digest(match):
+                self.node(record, match, label(key), self.step(state, i))
+
+        for key, record in index.items():
+            self.add("record_added", label(key), record)
+
+    def unkeyed(self, src, tgt, prefix, state):
+        if self.ignore_order:
+            self.unordered(src, tgt, prefix, state)
+        else:
+            self.ordered(src, tgt, prefix, state)
+
+
+def diff_json(source_data, target_data, ignore_order=True, keys=None, rules=None, **deepdiff_kwargs):
+    """
+    DeepDiff-style report {report_type: {path: detail} or [path, ...]} between two parsed JSON
+    values. Subtrees with equal canonical hashes are skipped; DeepDiff only sees
+    the parts that actually differ. Arrays of records are joined on `keys`
+    (see _Differ) and report record_added / record_removed plus per-field
+    changes. `rules` (PathRules) prunes ignored paths from both sides first and
+    supplies numeric tolerances. Empty dict means equal.
+    """
+    differ = _Differ(ignore_order=ignore_order, keys=keys, rules=rules, deepdiff_kwargs=deepdiff_kwargs)
+    state = None
+    if differ.rules is not None:
+        source_data = differ.rules.prune(source_data)
+        target_data = differ.rules.prune(target_data)
+        state = differ.rules.root_state
+    differ.node(source_data, target_data, "root", state)
+    return differ.report
@@ -0,0 +1,181 @@
+from collections import OrderedDict
+
+from pl_compare_rules import is_number
+
+# -------------------- CONFIG --------------------
+# Unmatched leaves buffered per side while waiting for their partner
+DEFAULT_WINDOW = 10000
+_CONTAINER_START = {"start_map": dict, "start_array": list}
+_CONTAINER_END = {"end_map", "end_array"}
+
+
+# -------------------- EVENTS -> LEAVES --------------------
+def require_ijson():
+    """The ijson module; streaming is the only feature that needs it (pip install ijson)."""
+    try:
+        import ijson
+    except ImportError:
+        raise ImportError("Streaming comparison needs ijson: pip install ijson")
+    return ijson
+
+
+def iter_leaves(fp):
+    """
+    Incrementally parse a JSON document (binary file object, e.g. open(..., "rb")
+    or ResponseStore.open) and yield (segments, value) for every leaf, where
+    segments is the key / index path as a tuple. Empty objects and arrays are
+    leaves too ({} / []). Memory use is bounded by nesting depth, not size.
+    """
+    ijson = require_ijson()
+
+    path = []      # key / index of each open container
+    stack = []     # [container type, child count]
+    for _, event, value in ijson.parse(fp, use_float=True):
+        if event == "map_key":
+            path[-1] = value
+            continue
+
+        if stack and stack[-1][0] is list and event not in _CONTAINER_END:
+            # Next array element
+            path[-1] = stack[-1][1]
+        if stack and event not in _CONTAINER_END:
+            stack[-1][1] += 1
+
+        if event in _CONTAINER_START:
+            stack.append([_CONTAINER_START[event], 0])
+            path.append(None)
+        elif event in _CONTAINER_END:
+            kind, count = stack.pop()
+            path.pop()
+            if count == 0:
+                yield tuple(path), kind()
+        else:
+            yield tuple(path), value
+
+
+def format_path(segments):
+    """('data', 3, 'price') -> root['data'][3]['price'] (DeepDiff style)"""
+    return "root" + "".join(f"[{s}]" if isinstance(s, int) else f"[{s!r}]" for s in segments)
+
+
+# -------------------- STREAMING DIFF --------------------
+def stream_diff(src_fp, tgt_fp, rules=None, window=DEFAULT_WINDOW):
+    """
+    Compare two JSON documents leaf by leaf while both are being parsed and
+    yield differences as they are found:
+
+        ("values_changed", path, {"old_value": ..., "new_value": ...})
+        ("type_changes",   path, {"old_value": ..., "new_value": ...})
+        ("item_removed",   path, old_value)
+        ("item_added",     path, new_value)
+
+    Leaves are paired by path. Documents walked in the same order pair up
+    immediately; a leaf that is ahead on one side (e.g. object keys in a
+    different order) waits in a per-side buffer of at most `window` leaves, the
+    oldest being reported as removed / added once the buffer is full. Arrays
+    are compared by position - use the in-memory diff for order-insensitive
+    arrays.
+
+    `rules` (pl_compare_rules.PathRules) drops ignored leaves as they are
+    parsed and applies numeric tolerances per path.
+    """
+    rules = rules if rules is not None and not rules.empty else None
+
+    def leaves(fp):
+        """(segments, value, rule state) of every leaf that is not ignored."""
+        if rules is None:
+            for segments, value in iter_leaves(fp):
+                yield segments, value, None
+            return
+        # Consecutive leaves share most of their path: keep one rule state per
+        # depth and only step through the segments that changed
+        prev, states, ignored = (), [rules.root_state], [False]
+        for segments, value in iter_leaves(fp):
+            if len(segments) == len(prev) and segments[:-1] == prev[:-1]:
+                common = len(segments) - 1   # sibling of the previous leaf
+            else:
+                common = 0
+                for a, b in zip(prev, segments):
+                    if a != b:
+                        break
+                    common += 1
+            del states[common + 1:], ignored[common + 1:]
+            for seg in segments[common:]:
+                state = rules.step(states[-1], seg)
+                states.append(state)
+                ignored.append(ignored[-1] or rules.ignored(state))
+            prev = segments
+            if not ignored[-1]:
+                yield segments, value, states[-1]
+
+    def compare(segments, old, new, state):
+        if is_number(old) and is_number(new):
+            if old == new or (state and rules.numbers_equal(state, old, new)):
+                return None
+        elif type(old) is type(new) and old == new:
+            return None
+        detail = {"old_value": old, "new_value": new}
+        if type(old) is not type(new) and not (is_number(old) and is_number(new)):
+            return "type_changes", format_path(segments), detail
+        return "values_changed", format_path(segments), detail
+
+    src_iter, tgt_iter = leaves(src_fp), leaves(tgt_fp)
+    src_pending, tgt_pending = OrderedDict(), OrderedDict()
+    _END = object()
+
+    while True:
+        src_leaf = next(src_iter, _END)
+        tgt_leaf = next(tgt_iter, _END)
+        if src_leaf is _END and tgt_leaf is _END:
+            break
+
+        if src_leaf is not _END and tgt_leaf is not _END and src_leaf[0] == tgt_leaf[0]:
+            change = compare(src_leaf[0], src_leaf[1], tgt_leaf[1], src_leaf[2])
+            if change:
+                yield change
+            continue
+
+        # Out of step: pair each leaf with the other side's buffer or park it
+        if src_leaf is not _END:
+            segments, value, state = src_leaf
+            if segments in tgt_pending:
+                change = compare(segments, value, tgt_pending.pop(segments), state)
+                if change:
+                    yield change
+            else:
+                src_pending[segments] = (value, state)
+                if len(src_pending) > window:
+                    old_segments, (old_value, _) = src_pending.popitem(last=False)
+                    yield "item_removed", format_path(old_segments), old_value
+
+        if tgt_leaf is not _END:
+            segments, value, _ = tgt_leaf
+            if segments in src_pending:
+                old_value, state = src_pending.pop(segments)
+                change = compare(segments, old_value, value, state)
+                if change:
+                    yield change
+            else:
+                tgt_pending[segments] = value
+                if len(tgt_pending) > window:
+                    new_segments, new_value = tgt_pending.popitem(last=False)
+                    yield "item_added", format_path(new_segments), new_value
+
+    for segments, (value, _) in src_pending.items():
+        yield "item_removed", format_path(segments), value
+    for segments, value in tgt_pending.items():
+        yield "item_added", format_path(segments), value
+
+
+def collect_diffs(src_fp, tgt_fp, rules=None, window=DEFAULT_WINDOW, max_diffs=None):
+    """
+    Run stream_diff to the end. Returns (diff_count, diffs) where diffs keeps
+    at most `max_diffs` entries (all when None) so a report row stays small
+    while every difference is still counted.
+    """
+    count, diffs = 0, []
+    for change in stream_diff(src_fp, tgt_fp, rules, window):
+        count += 1
+        if max_diffs is None or len(diffs) < max_diffs:
+            diffs.append(change)
+    return count, diffs
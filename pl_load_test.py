@@ -0,0 +1,268 @@
+import os
+import json
+import time
+import itertools
+import threading
+import pandas as pd
+from concurrent.futures import ThreadPoolExecutor
+from dotenv import load_dotenv
+from requests_ntlm import HttpNtlmAuth
+from auth import get_password
+from pl_http import SessionPool, sso_auth
+import pl_testgenerator_cleanURL as generator
+
+# -------------------- CONFIG --------------------
+load_dotenv()
+USERNAME = os.getenv("USERNAME")
+PASSWORD = get_password()
+if not USERNAME or not PASSWORD:
+    raise Exception("Missing USERNAME or PASSWORD")
+AUTH = HttpNtlmAuth(USERNAME, PASSWORD)
+
+API_TESTDATA_FILE = "shared/input/ApiTestData.json"
+with open(API_TESTDATA_FILE, "r") as f:
+    SYSTEM = json.load(f).get("System", "UNKNOWN")
+OUTPUT_XLSX = os.path.join("shared", "reports", f"{SYSTEM}_load_test.xlsx")
+
+# Environment under load: SOURCE or TARGET column of the test matrix
+LOAD_ENV = os.getenv("LOAD_ENV", "TARGET").strip().capitalize()
+# Test cases from an existing pl_testcases.xlsx instead of generating the matrix again
+LOAD_CASES_FILE = os.getenv("LOAD_CASES_FILE")
+
+# LOAD_RATE > 0: open loop, requests start at that rate (req/s) whatever the
+# service does, with LOAD_CONCURRENCY as the cap on requests in flight.
+# LOAD_RATE = 0: closed loop, LOAD_CONCURRENCY clients send back to back.
+LOAD_RATE = float(os.getenv("LOAD_RATE", "0"))
+LOAD_CONCURRENCY = int(os.getenv("LOAD_CONCURRENCY", "8"))
+LOAD_DURATION = float(os.getenv("LOAD_DURATION", "60"))     # seconds
+LOAD_WARMUP = float(os.getenv("LOAD_WARMUP", "0"))          # seconds left out of the statistics
+LOAD_TIMEOUT = 30
+CHUNK_SIZE = 256 * 1024
+
+# Pass criteria: error rate, and p95 latency (0 = no latency criterion)
+LOAD_MAX_ERROR_RATE = float(os.getenv("LOAD_MAX_ERROR_RATE", "0.01"))
+LOAD_MAX_P95_MS = float(os.getenv("LOAD_MAX_P95_MS", "0"))
+
+# Latency histogram bucket upper bounds (ms); anything slower lands in the last bucket
+HISTOGRAM_MS = (5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+PERCENTILES = (50, 90, 95, 99)
+
+
+# -------------------- TARGETS --------------------
+def iter_targets():
+    """(TagName, URL) for LOAD_ENV, one per test case of the matrix."""
+    if LOAD_CASES_FILE:
+        tests = pd.read_excel(LOAD_CASES_FILE).to_dict("records")
+    else:
+        tests = generator.iter_test_cases()
+    column = f"{LOAD_ENV}RequestURL"
+    for test in tests:
+        url = test.get(column)
+        if isinstance(url, str) and url.strip():
+            yield test["TagName"], url.strip()
+
+
+class TargetCycle:
+    """Thread-safe endless cycle over the matrix; cases are generated only as they are first needed."""
+
+    def __init__(self, targets):
+        self._cycle = itertools.cycle(targets)
+        self._lock = threading.Lock()
+
+    def next(self):
+        with self._lock:
+            return next(self._cycle, None)
+
+
+# -------------------- REQUESTS --------------------
+def send(pool, target, t0, scheduled=None):
+    """
+    One request with the body read and discarded. Returns
+    (start offset s, tag, status, error, latency s, bytes). In open-loop mode
+    latency counts from the `scheduled` start, so time spent waiting for a free
+    slot behind a slow service is included rather than hidden.
+    """
+    tag, url = target
+    start = time.perf_counter()
+    status, error, size = None, None, 0
+    try:
+        with pool.get(url, timeout=LOAD_TIMEOUT, stream=True) as resp:
+            status = resp.status_code
+            for chunk in resp.iter_content(chunk_size=CHUNK_SIZE):
+                size += len(chunk)
+        if status >= 400:
+            error = f"HTTP {status}"
+    except Exception as ex:
+        error = type(ex).__name__
+    begin = scheduled if scheduled is not None else start
+    return begin - t0, tag, status, error, time.perf_counter() - begin, size
+
+
+def run_closed_loop(pool, targets, concurrency, duration):
+    """`concurrency` clients, each sending its next request as soon as the last one is done."""
+    samples = []
+    t0 = time.perf_counter()
+    deadline = t0 + duration
+
+    def client():
+        while time.perf_counter() < deadline:
+            target = targets.next()
+            if target is None:
+                return
+            samples.append(send(pool, target, t0))
+
+    threads = [threading.Thread(target=client, daemon=True) for _ in range(concurrency)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return samples, 0, time.perf_counter() - t0
+
+
+def run_open_loop(pool, targets, rate, concurrency, duration):
+    """
+    Requests start every 1/rate seconds. Requests still queued for a slot when
+    the duration is up are cancelled and reported as dropped: the service did
+    not keep up with the rate.
+    """
+    futures = []
+    t0 = time.perf_counter()
+    executor = ThreadPoolExecutor(max_workers=concurrency)
+    try:
+        for i in itertools.count():
+            scheduled = t0 + i / rate
+            if scheduled - t0 >= duration:
+                break
+            target = targets.next()
+            if target is None:
+                break
+            wait = scheduled - time.perf_counter()
+            if wait > 0:
+                time.sleep(wait)
+            futures.append(executor.submit(send, pool, target, t0, scheduled))
+        # Requests scheduled near the end still get until the deadline to start
+        time.sleep(max(0.0, t0 + duration - time.perf_counter()))
+    finally:
+        executor.shutdown(wait=True, cancel_futures=True)
+    samples = [f.result() for f in futures if not f.cancelled()]
+    return samples, len(futures) - len(samples), time.perf_counter() - t0
+
+
+# -------------------- REPORT --------------------
+def percentiles(latency_ms):
+    return {f"p{q} (ms)": round(latency_ms.quantile(q / 100), 1) if len(latency_ms) else None
+            for q in PERCENTILES}
+
+
+def histogram(latency_ms):
+    """Request count per latency bucket, with cumulative share."""
+    edges = [0, *HISTOGRAM_MS, float("inf")]
+    labels = [f"≤ {hi} ms" for hi in HISTOGRAM_MS] + [f"> {HISTOGRAM_MS[-1]} ms"]
+    counts = pd.cut(latency_ms, bins=edges, labels=labels, include_lowest=True).value_counts(sort=False)
+    total = max(len(latency_ms), 1)
+    return pd.DataFrame({
+        "Bucket": labels,
+        "Requests": counts.values,
+        "Percent": (counts.values / total * 100).round(2),
+        "Cumulative %": (counts.values.cumsum() / total * 100).round(2),
+    })
+
+
+def build_report(samples, dropped, elapsed, warmup=LOAD_WARMUP):
+    """DataFrames for the Excel report: summary, histogram, errors, per endpoint, per second."""
+    df = pd.DataFrame(samples, columns=["offset", "tag", "status", "error", "latency", "bytes"])
+    df = df[df["offset"] >= warmup].copy()
+    measured = max(elapsed - warmup, 1e-9)
+    df["latency_ms"] = df["latency"] * 1000
+    errors = df["error"].notna()
+    ok_ms = df.loc[~errors, "latency_ms"]
+
+    summary = {
+        "Environment": LOAD_ENV,
+        "Mode": f"open loop, {LOAD_RATE:g} req/s" if LOAD_RATE > 0 else "closed loop",
+        "Concurrency": LOAD_CONCURRENCY,
+        "Duration (s)": round(measured, 1),
+        "Requests": len(df),
+        "Errors": int(errors.sum()),
+        "Error Rate %": round(errors.mean() * 100, 2) if len(df) else None,
+        "Dropped": dropped,
+        "Throughput (req/s)": round(len(df) / measured, 1),
+        "Throughput (MB/s)": round(df["bytes"].sum() / measured / 1024 / 1024, 2),
+        **percentiles(ok_ms),
+        "Max (ms)": round(ok_ms.max(), 1) if len(ok_ms) else None,
+    }
+    failed = []
+    if len(df) == 0:
+        failed.append("no requests")
+    elif errors.mean() > LOAD_MAX_ERROR_RATE:
+        failed.append(f"error rate above {LOAD_MAX_ERROR_RATE:.1%}")
+    if dropped:
+        failed.append(f"{dropped} requests dropped")
+    if LOAD_MAX_P95_MS and (summary["p95 (ms)"] is None or summary["p95 (ms)"] > LOAD_MAX_P95_MS):
+        failed.append(f"p95 above {LOAD_MAX_P95_MS:g} ms")
+    summary["Verdict"] = "FAIL: " + "; ".join(failed) if failed else "PASS"
+
+    error_counts = df.loc[errors, "error"].value_counts().rename_axis("Error").reset_index(name="Requests")
+
+    endpoints = []
+    for tag, group in df.groupby("tag", sort=True):
+        group_errors = group["error"].notna()
+        endpoints.append({
+            "TagName": tag,
+            "Requests": len(group),
+            "Error Rate %": round(group_errors.mean() * 100, 2),
+            **percentiles(group.loc[~group_errors, "latency_ms"]),
+        })
+
+    timeline = []
+    for second, group in df.groupby(df["offset"].astype(int)):
+        timeline.append({
+            "Second": second,
+            "Requests": len(group),
+            "Errors": int(group["error"].notna().sum()),
+            "p50 (ms)": round(group["latency_ms"].median(), 1),
+            "p95 (ms)": round(group["latency_ms"].quantile(0.95), 1),
+        })
+
+    return {
+        "Summary": pd.DataFrame([summary]).T.reset_index().set_axis(["Metric", "Value"], axis=1),
+        "Histogram": histogram(ok_ms),
+        "Errors": error_counts,
+        "Endpoints": pd.DataFrame(endpoints),
+        "Timeline": pd.DataFrame(timeline),
+    }, summary
+
+
+# -------------------- MAIN --------------------
+def main():
+    targets = TargetCycle(iter_targets())
+    pool = SessionPool(AUTH, per_host=LOAD_CONCURRENCY, fallback_auth=sso_auth())
+    mode = f"{LOAD_RATE:g} req/s (max {LOAD_CONCURRENCY} in flight)" if LOAD_RATE > 0 \
+        else f"{LOAD_CONCURRENCY} concurrent clients"
+    print(f"Load test on {LOAD_ENV}: {mode} for {LOAD_DURATION:g}s...")
+    try:
+        if LOAD_RATE > 0:
+            samples, dropped, elapsed = run_open_loop(pool, targets, LOAD_RATE, LOAD_CONCURRENCY, LOAD_DURATION)
+        else:
+            samples, dropped, elapsed = run_closed_loop(pool, targets, LOAD_CONCURRENCY, LOAD_DURATION)
+    finally:
+        pool.close()
+
+    if not samples:
+        print("No requests sent - is the test matrix empty?")
+        return
+
+    sheets, summary = build_report(samples, dropped, elapsed)
+    with pd.ExcelWriter(OUTPUT_XLSX) as writer:
+        for name, frame in sheets.items():
+            frame.to_excel(writer, sheet_name=name, index=False)
+
+    print(f"{summary['Requests']} requests in {summary['Duration (s)']}s: "
+          f"{summary['Throughput (req/s)']} req/s, {summary['Error Rate %']}% errors"
+          + (f", {dropped} dropped" if dropped else ""))
+    print(" | ".join(f"{k} {summary[k]}" for k in ("p50 (ms)", "p95 (ms)", "p99 (ms)", "Max (ms)")))
+    print(f"{'✅' if summary['Verdict'] == 'PASS' else '❌'} {summary['Verdict']} → {OUTPUT_XLSX}")
+
+
+if __name__ == "__main__":
+    main()
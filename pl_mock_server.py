@@ -0,0 +1,169 @@
+import os
+import json
+import time
+import shutil
+import threading
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from requests.utils import requote_uri
+from dotenv import load_dotenv
+from pl_http import host_of, SECRET_HEADERS
+from pl_response_store import ResponseStore, CHUNK_SIZE
+
+# -------------------- CONFIG --------------------
+load_dotenv()
+APITESTDATA_FILE = "shared/input/ApiTestData.json"
+with open(APITESTDATA_FILE, "r") as f:
+    SYSTEM = json.load(f).get("System", "UNKNOWN")
+
+# Store whose index (the capture log) is replayed
+STORE_DIR = os.getenv("MOCK_STORE", os.path.join("shared", "reports", SYSTEM, "response_store"))
+# Replay one run only (default: every run in the index, the latest capture of a URL wins)
+RUN_ID = os.getenv("MOCK_RUN_ID")
+
+# One local port per recorded origin (SOURCE host, TARGET host, ...), counting up from here
+MOCK_BIND = os.getenv("MOCK_BIND", "127.0.0.1")
+MOCK_PORT = int(os.getenv("MOCK_PORT", "8700"))
+# Origin -> mock origin map; point PL_MOCK_HOSTS at it to send pl_http sessions here
+HOSTS_FILE = os.path.join(STORE_DIR, "mock_hosts.json")
+
+# "none" replays at full speed, "ttfb" / "elapsed" wait as long as the live service did
+MOCK_LATENCY = os.getenv("MOCK_LATENCY", "none").lower()
+
+# Recorded response headers not replayed: the body is served decompressed at its
+# own length, and the server writes Server / Date itself
+DROP_HEADERS = {"content-length", "content-encoding", "transfer-encoding", "connection", "keep-alive",
+                "server", "date"}
+
+
+# -------------------- LOG --------------------
+def request_key(url):
+    """Path + query as a client sends it on the wire - what the handler sees as self.path."""
+    url = requote_uri(url)
+    return url[len(host_of(url)):] or "/"
+
+
+def load_log(store, run_id=None):
+    """{origin: {path+query: entry}} from the capture index; later captures replace earlier ones."""
+    routes = {}
+    for entry in store.entries(run_id):
+        url = entry.get("url")
+        if not url or entry.get("status") is None:
+            continue  # connection errors have no response to replay
+        routes.setdefault(host_of(url), {})[request_key(url)] = entry
+    return routes
+
+
+# -------------------- SERVER --------------------
+class ReplayHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive, like the real services
+
+    def do_GET(self):
+        self.replay(send_body=True)
+
+    def do_HEAD(self):
+        self.replay(send_body=False)
+
+    def replay(self, send_body):
+        server = self.server
+        entry = server.routes.get(self.path)
+        if entry is None:
+            server.count("misses")
+            body = json.dumps({"error": "not in capture log", "path": self.path}).encode()
+            self.send_response(404)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.send_header("X-Mock-Miss", "1")
+            self.end_headers()
+            if send_body:
+                self.wfile.write(body)
+            return
+
+        server.count("hits")
+        delay = entry.get(MOCK_LATENCY) if MOCK_LATENCY in ("ttfb", "elapsed") else None
+        if delay:
+            time.sleep(delay)
+
+        sha256 = entry.get("sha256")
+        has_body = server.store.has(sha256)
+        self.send_response(entry["status"])
+        for name, value in (entry.get("headers") or {}).items():
+            # SECRET_HEADERS too: logs written before they were filtered may still hold them
+            if name.lower() not in DROP_HEADERS and name.lower() not in SECRET_HEADERS:
+                self.send_header(name, value)
+        if entry.get("content_type") and not entry.get("headers"):
+            self.send_header("Content-Type", entry["content_type"])
+        self.send_header("Content-Length", str(server.store.size(sha256) if has_body else 0))
+        self.end_headers()
+        if send_body and has_body:
+            with server.store.open(sha256) as body:
+                shutil.copyfileobj(body, self.wfile, CHUNK_SIZE)
+
+    def log_message(self, format, *args):
+        pass  # one line per request would drown the summary
+
+
+class ReplayServer(ThreadingHTTPServer):
+    """Serves the captured responses of one origin."""
+
+    daemon_threads = True
+
+    def __init__(self, address, origin, routes, store):
+        super().__init__(address, ReplayHandler)
+        self.origin = origin
+        self.routes = routes
+        self.store = store
+        self.stats = {"hits": 0, "misses": 0}
+        self._lock = threading.Lock()
+
+    def count(self, key):
+        with self._lock:
+            self.stats[key] += 1
+
+
+def start_servers(store, run_id=None, bind=MOCK_BIND, port=MOCK_PORT):
+    """
+    Start one ReplayServer per origin in the log, each on its own thread.
+    Returns the servers and the {origin: mock origin} map (port 0 = any free port).
+    """
+    servers, hosts = [], {}
+    for i, (origin, routes) in enumerate(sorted(load_log(store, run_id).items())):
+        server = ReplayServer((bind, port + i if port else 0), origin, routes, store)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        servers.append(server)
+        hosts[origin] = f"http://{bind}:{server.server_address[1]}"
+    return servers, hosts
+
+
+def stop_servers(servers):
+    for server in servers:
+        server.shutdown()
+        server.server_close()
+
+
+# -------------------- MAIN --------------------
+def main():
+    store = ResponseStore(STORE_DIR)
+    servers, hosts = start_servers(store, RUN_ID)
+    if not servers:
+        print(f"Nothing to replay in {store.index_path}")
+        return
+
+    with open(HOSTS_FILE, "w", encoding="utf-8") as f:
+        json.dump(hosts, f, indent=2)
+    for server in servers:
+        print(f"{server.origin} → {hosts[server.origin]} ({len(server.routes)} responses)")
+    print(f"Set PL_MOCK_HOSTS={HOSTS_FILE} to replay through pl_http sessions (Ctrl+C to stop)")
+
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        stop_servers(servers)
+        for server in servers:
+            print(f"{server.origin}: {server.stats['hits']} replayed, {server.stats['misses']} not in log")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+import itertools
+from math import prod
+
+# -------------------- CONFIG --------------------
+# "full" = Cartesian product, "pairwise" = every value pair, "3-wise" etc. = every value t-tuple
+COVERAGE_MODES = ("full", "pairwise", "N-wise")
+
+
+def coverage_strength(mode):
+    """COVERAGE_MODE -> t (None for the full product)."""
+    mode = str(mode or "full").strip().lower()
+    if mode in ("full", "product", "all"):
+        return None
+    if mode in ("pairwise", "2-wise"):
+        return 2
+    if mode.endswith("-wise") and mode[:-5].isdigit() and int(mode[:-5]) >= 1:
+        return int(mode[:-5])
+    raise ValueError(f"Unknown coverage mode {mode!r}; use one of {', '.join(COVERAGE_MODES)}")
+
+
+# -------------------- COVERING ARRAY --------------------
+def covering_array(param_values, strength=2):
+    """
+    Rows (as {param: value} dicts) such that every combination of values of
+    any `strength` parameters appears in at least one row - a t-wise covering
+    array, built with the greedy in-parameter-order (IPOG) strategy:
+
+      1. full product of the `strength` largest parameters
+      2. each further parameter is added column-wise, picking per row the value
+         that covers the most still-uncovered t-tuples (horizontal growth)
+      3. t-tuples left over get rows of their own, merged where the free
+         ("don't care") cells allow (vertical growth)
+
+    For n parameters of v values each the result grows roughly with
+    v^t * log(n) instead of v^n. Deterministic for the same input.
+    """
+    names = list(param_values)
+    domains = [list(values) for values in param_values.values()]
+    if any(not d for d in domains):
+        return []
+    if strength is None or len(names) <= strength:
+        return [dict(zip(names, combo)) for combo in itertools.product(*domains)]
+
+    # Largest domains first - IPOG gives smaller arrays that way
+    order = sorted(range(len(names)), key=lambda i: -len(domains[i]))
+    sizes = [len(domains[i]) for i in order]
+
+    rows = [list(combo) for combo in itertools.product(*(range(n) for n in sizes[:strength]))]
+
+    for col in range(strength, len(sizes)):
+        # Uncovered t-tuples involving `col`: per choice of t-1 earlier columns
+        uncovered = {
+            cols: set(itertools.product(*(range(sizes[c]) for c in cols), range(sizes[col])))
+            for cols in itertools.combinations(range(col), strength - 1)
+        }
+
+        # Horizontal growth
+        for row in rows:
+            best_value, best_hits = 0, None
+            for value in range(sizes[col]):
+                hits = sum(
+                    1 for cols, todo in uncovered.items()
+                    if None not in (key := tuple(row[c] for c in cols)) and key + (value,) in todo
+                )
+                if best_hits is None or hits > best_hits:
+                    best_value, best_hits = value, hits
+            row.append(best_value)
+            for cols, todo in uncovered.items():
+                key = tuple(row[c] for c in cols)
+                if None not in key:
+                    todo.discard(key + (best_value,))
+
+        # Vertical growth: new rows only ever need the t cells of their tuple
+        first_new = len(rows)
+        for cols, todo in uncovered.items():
+            for tup in sorted(todo):
+                wanted = dict(zip(cols + (col,), tup))
+                for row in itertools.islice(rows, first_new, None):
+                    if all(row[c] is None or row[c] == v for c, v in wanted.items()):
+                        break
+                else:
+                    row = [None] * (col + 1)
+                    rows.append(row)
+                for c, v in wanted.items():
+                    row[c] = v
+
+    # Free cells: any value does, cycle through them for variety
+    result = []
+    for n, row in enumerate(rows):
+        values = [None] * len(names)
+        for pos, c in enumerate(order):
+            idx = row[pos] if row[pos] is not None else n % sizes[pos]
+            values[c] = domains[c][idx]
+        result.append(dict(zip(names, values)))
+    return result
+
+
+def iter_combinations(param_values, mode="full"):
+    """
+    Parameter combinations for one endpoint under COVERAGE_MODE: the full
+    product (a lazy generator) or a t-wise covering array (a list).
+    """
+    strength = coverage_strength(mode)
+    if strength is None:
+        names = list(param_values)
+        return (dict(zip(names, combo)) for combo in itertools.product(*param_values.values()))
+    return covering_array(param_values, strength)
+
+
+def full_size(param_values):
+    """Number of combinations in the full product."""
+    return prod(len(v) for v in param_values.values())
@@ -0,0 +1,163 @@
+import os
+import json
+import time
+import asyncio
+import threading
+import pandas as pd
+from dotenv import load_dotenv
+from requests_ntlm import HttpNtlmAuth
+from auth import get_password
+from pl_http import sso_auth
+from pl_response_capture import ResponseCapture
+from pl_response_store import ResponseStore, response_ref
+import pl_testgenerator_cleanURL as generator
+
+# -------------------- CONFIG --------------------
+load_dotenv()
+USERNAME = os.getenv("USERNAME")
+PASSWORD = get_password()
+if not USERNAME or not PASSWORD:
+    raise Exception("Missing USERNAME or PASSWORD")
+AUTH = HttpNtlmAuth(USERNAME, PASSWORD)
+
+API_TESTDATA_FILE = "shared/input/ApiTestData.json"
+with open(API_TESTDATA_FILE, "r") as f:
+    SYSTEM = json.load(f).get("System", "UNKNOWN")
+REPORT_BASE = os.path.join("shared", "reports", SYSTEM)
+os.makedirs(REPORT_BASE, exist_ok=True)
+
+# Bodies and the capture index (one entry per request) are the hand-off to the
+# comparison stage: run the comparators with COMPARE_INPUT=index. The Excel
+# files below are audit copies only
+STORE = ResponseStore(os.path.join(REPORT_BASE, "response_store"))
+OUTPUT_XLSX = os.path.join("shared", "reports", "pl_responseComparison.xlsx")
+ERROR_LOG_XLSX = os.path.join("shared", "reports", "RESPONSE_ERROR.xlsx")
+WRITE_EXCEL = os.getenv("PIPELINE_EXCEL", "1") == "1"
+
+# Generated cases waiting for a capture slot; the generator blocks when it is full
+QUEUE_SIZE = int(os.getenv("PIPELINE_QUEUE_SIZE", "256"))
+PER_HOST_CONCURRENCY = int(os.getenv("PER_HOST_CONCURRENCY", "8"))
+
+
+# -------------------- CASES --------------------
+def to_case(test):
+    """Test case row -> capture case: SOURCE and TARGET request (missing URLs skipped)."""
+    return [
+        {"case_id": test["TestCaseID"], "env": env, "url": test[f"{env}RequestURL"]}
+        for env in ("Source", "Target") if test.get(f"{env}RequestURL")
+    ]
+
+
+def summary_row(test, case_results):
+    """Same columns as pl_SaveResponses, so the comparison scripts can read either."""
+    row = dict(test, Response="", SourceResponse="", TargetResponse="", ComparisonResult="", Comments="")
+    errors = {"Source": "Missing URL", "Target": "Missing URL"}
+    for r in case_results:
+        errors[r["env"]] = r["error"]
+        if r["error"] is None:
+            row[f"{r['env']}Response"] = response_ref(r["sha256"])
+    if errors["Source"] is None and errors["Target"] is None:
+        row["Response"] = "FETCHED"
+    elif errors["Source"] is not None:
+        row["Response"] = f"SOURCE ERROR: {errors['Source']}"
+    else:
+        row["Response"] = f"TARGET ERROR: {errors['Target']}"
+    return row
+
+
+# -------------------- PIPELINE --------------------
+async def run_pipeline(tests, on_result, queue_size=QUEUE_SIZE, **capture_kwargs):
+    """
+    Feed `tests` (any iterable, typically a generator) into the capture engine
+    through a bounded queue. The generator runs in a worker thread, so
+    requests start as soon as the first case exists and generation keeps
+    going while they are in flight; when the queue is full the generator
+    waits. `on_result(test, case_results)` is called as each case completes.
+    Returns the number of cases captured.
+    """
+    loop = asyncio.get_running_loop()
+    cases = asyncio.Queue(maxsize=queue_size)
+    engine = ResponseCapture(**capture_kwargs)
+
+    def put(item):
+        asyncio.run_coroutine_threadsafe(cases.put(item), loop).result()
+
+    stop = threading.Event()
+
+    def produce():
+        try:
+            for test in tests:
+                if stop.is_set():
+                    break
+                case = to_case(test)
+                if case:
+                    case[0]["test"] = test  # rides along for the callback
+                    put(case)
+        finally:
+            put(None)
+
+    def handle(case, case_results):
+        on_result(case[0]["test"], case_results)
+
+    producer = loop.run_in_executor(None, produce)
+    try:
+        count = await engine.run_queue(cases, handle)
+        await producer  # re-raises a generator error
+    except BaseException:
+        # Unblock and stop the generator thread before giving up
+        stop.set()
+        while not producer.done():
+            while not cases.empty():
+                cases.get_nowait()
+            await asyncio.sleep(0.05)
+        raise
+    finally:
+        engine.close()
+    return count
+
+
+# -------------------- MAIN --------------------
+def main():
+    t0 = time.perf_counter()
+    first_result = None
+    tests, rows, error_logs = [], [], []
+
+    def generated():
+        for test in generator.iter_test_cases():
+            if WRITE_EXCEL:
+                tests.append(test)
+            yield test
+
+    def on_result(test, case_results):
+        nonlocal first_result
+        if first_result is None:
+            first_result = time.perf_counter() - t0
+        row = summary_row(test, case_results)
+        rows.append(row)
+        for r in case_results:
+            if r["error"] is not None:
+                error_logs.append({"TestCaseID": test["TestCaseID"], "TagName": test["TagName"],
+                                   "Endpoint": r["url"], "Error": r["error"]})
+
+    count = asyncio.run(run_pipeline(generated(), on_result, auth=AUTH, fallback_auth=sso_auth(),
+                                     per_host=PER_HOST_CONCURRENCY, store=STORE))
+
+    elapsed = time.perf_counter() - t0
+    print(f"\nCaptured {count} test cases in {elapsed:.1f}s"
+          + (f" (first case done after {first_result:.1f}s)" if first_result is not None else ""))
+    print(f"Capture index: {STORE.index_path}")
+
+    if WRITE_EXCEL:
+        generator.write_test_cases(tests)
+        # Completion order -> generation order for the audit copy
+        order = {t["TestCaseID"]: i for i, t in enumerate(tests)}
+        rows.sort(key=lambda r: order.get(r["TestCaseID"], len(order)))
+        pd.DataFrame(rows).to_excel(OUTPUT_XLSX, index=False)
+        print(f"✅ Test cases → {generator.OUTPUT_FILE}, response summary → {OUTPUT_XLSX}")
+    if error_logs:
+        pd.DataFrame(error_logs).to_excel(ERROR_LOG_XLSX, index=False)
+        print(f"❌ Errors logged to → {ERROR_LOG_XLSX}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,225 @@
+import os
+import json
+import time
+import asyncio
+import hashlib
+from concurrent.futures import ThreadPoolExecutor
+
+from pl_http import SessionPool, host_of, timed, loggable_headers, DEFAULT_PER_HOST
+
+# -------------------- CONFIG --------------------
+DEFAULT_TIMEOUT = 30
+CHUNK_SIZE = 256 * 1024
+
+
+# -------------------- WRITERS --------------------
+def stream_to_file(resp, out_path, chunk_size=CHUNK_SIZE):
+    """
+    Stream the body to disk chunk by chunk, exactly as received (no JSON
+    parse / re-dump). Written to a .part file and renamed, so a failed download
+    never leaves a truncated response behind.
+    Returns content type, size in bytes and sha256 of the body.
+    """
+    digest = hashlib.sha256()
+    size = 0
+    part_path = f"{out_path}.part"
+    with open(part_path, "wb") as f:
+        for chunk in resp.iter_content(chunk_size=chunk_size):
+            if chunk:
+                f.write(chunk)
+                digest.update(chunk)
+                size += len(chunk)
+    os.replace(part_path, out_path)
+    return {
+        "content_type": resp.headers.get("Content-Type", ""),
+        "size": size,
+        "sha256": digest.hexdigest(),
+    }
+
+
+def normalise_json_file(path, out_path=None, indent=2):
+    """
+    Optional post-step: pretty-print a captured JSON body (in place by default).
+    Non-JSON bodies are left untouched. Returns True if the file was rewritten.
+    """
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return False
+    with open(out_path or path, "w", encoding="utf-8") as f:
+        json.dump(data, f, indent=indent, ensure_ascii=False)
+    return True
+
+
+# -------------------- ENGINE --------------------
+class ResponseCapture:
+    """
+    Captures API responses for test cases with asyncio on top of pooled NTLM
+    sessions.
+
+    A case is a list of requests:
+        {"case_id": ..., "env": "SOURCE" | "TARGET", "url": ..., "path": out_file or None}
+    All requests of one case (e.g. its SOURCE and TARGET call) are issued at the
+    same time; `per_host` caps in-flight requests per scheme://host:port, with
+    `host_limits` overriding it for individual hosts.
+    Bodies are streamed to disk by `writer` (default: stream_to_file), whose
+    content type / size / sha256 are added to each result. With a `store`
+    (pl_response_store.ResponseStore) bodies go into the store instead, and
+    every request - failed ones included - is recorded in its index.
+    Each result carries its timings in seconds: dns / connect / tls (0 when a
+    pooled connection was reused), ttfb (response headers in) and elapsed
+    (body read); an "endpoint" on the request (the URL template) is passed
+    through for pl_benchmark_report. Request and response headers are kept
+    too, so pl_mock_server can replay the run - minus credentials, cookies
+    and auth challenges (pl_http.SECRET_HEADERS).
+    `fallback_auth` (e.g. pl_http.sso_auth()) is tried for hosts that answer
+    401 to `auth`.
+    """
+
+    def __init__(self, auth=None, per_host=DEFAULT_PER_HOST, host_limits=None,
+                 timeout=DEFAULT_TIMEOUT, writer=stream_to_file, headers=None,
+                 max_in_flight=None, store=None, fallback_auth=None):
+        self.pool = SessionPool(auth, per_host=per_host, host_limits=host_limits, headers=headers,
+                                fallback_auth=fallback_auth)
+        self.timeout = timeout
+        self.writer = writer
+        self.store = store
+        self.max_in_flight = max_in_flight or per_host * 4
+        self._host_sems = {}
+        self._executor = ThreadPoolExecutor(max_workers=self.max_in_flight * 2)
+
+    # ---------- single request ----------
+    def _fetch_sync(self, request):
+        url, out_path = request["url"], request.get("path")
+        result = {
+            "case_id": request.get("case_id"),
+            "env": request.get("env"),
+            "endpoint": request.get("endpoint"),
+            "url": url,
+            "path": out_path,
+            "status": None,
+            "error": None,
+            "request_headers": None,
+            "headers": None,
+            "dns": None,
+            "connect": None,
+            "tls": None,
+            "ttfb": None,
+            "elapsed": None,
+            "content_type": None,
+            "size": None,
+            "sha256": None,
+        }
+        with timed() as timing:
+            t0 = time.perf_counter()
+            try:
+                with self.pool.get(url, timeout=self.timeout, stream=True) as resp:
+                    result["ttfb"] = time.perf_counter() - t0
+                    result["status"] = resp.status_code
+                    result["request_headers"] = loggable_headers(resp.request.headers)
+                    result["headers"] = loggable_headers(resp.headers)
+                    resp.raise_for_status()
+                    if self.store is not None:
+                        result.update(self.store.put_stream(resp))
+                    elif out_path:
+                        result.update(self.writer(resp, out_path) or {})
+            except Exception as ex:
+                result["error"] = str(ex)
+            result["elapsed"] = time.perf_counter() - t0
+        result.update(dns=timing["dns"], connect=timing["connect"], tls=timing["tls"])
+        if self.store is not None:
+            self.store.record(result)
+        return result
+
+    def _host_sem(self, url):
+        host = host_of(url)
+        if host not in self._host_sems:
+            self._host_sems[host] = asyncio.Semaphore(self.pool.limit(host))
+        return self._host_sems[host]
+
+    async def fetch(self, request):
+        async with self._host_sem(request["url"]):
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._executor, self._fetch_sync, request)
+
+    # ---------- cases ----------
+    async def capture_case(self, case):
+        """All requests of one case at once; results in request order."""
+        return list(await asyncio.gather(*(self.fetch(r) for r in case)))
+
+    async def run(self, cases, on_result=None, progress_every=10):
+        """
+        Capture every case and return per-case result lists in input order.
+        `cases` may be any iterable (including a generator); at most
+        `max_in_flight` cases are pulled and running at any time.
+        """
+        results = {}
+        cases_iter = enumerate(cases)
+        done = 0
+
+        async def worker():
+            nonlocal done
+            for idx, case in cases_iter:
+                case_results = await self.capture_case(case)
+                results[idx] = case_results
+                if on_result:
+                    on_result(case_results)
+                done += 1
+                if progress_every and done % progress_every == 0:
+                    print(f"Captured {done} test cases...", end="\r", flush=True)
+
+        await self._run_workers(worker)
+        return [results[i] for i in range(len(results))]
+
+    async def run_queue(self, cases, on_result, progress_every=10):
+        """
+        Capture cases taken from an asyncio.Queue until a None sentinel, for
+        producers that are still generating cases (see pl_pipeline).
+        `on_result(case, case_results)` is called in completion order; returns
+        the number of cases.
+        """
+        done = 0
+
+        async def worker():
+            nonlocal done
+            while True:
+                case = await cases.get()
+                if case is None:
+                    cases.put_nowait(None)  # let the other workers see it too
+                    return
+                on_result(case, await self.capture_case(case))
+                done += 1
+                if progress_every and done % progress_every == 0:
+                    print(f"Captured {done} test cases...", end="\r", flush=True)
+
+        await self._run_workers(worker)
+        return done
+
+    async def _run_workers(self, worker):
+        """
+        Run `max_in_flight` copies of `worker` as tasks. If one fails (or the
+        caller is cancelled) the others are cancelled and awaited before the
+        error propagates, so nothing submits to the executor after close().
+        """
+        tasks = [asyncio.ensure_future(worker()) for _ in range(self.max_in_flight)]
+        try:
+            await asyncio.gather(*tasks)
+        except BaseException:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            raise
+
+    def close(self):
+        self._executor.shutdown(wait=True)
+        self.pool.close()
+
+
+def capture_all(cases, auth=None, **kwargs):
+    """Synchronous entry point for scripts: run the engine over `cases` and close it."""
+    engine = ResponseCapture(auth=auth, **kwargs)
+    try:
+        return asyncio.run(engine.run(cases))
+    finally:
+        engine.close()
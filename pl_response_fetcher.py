@@ -2,17 +2,15 @@ import os
 import sys
 import json
 import time
-import threading
 import pandas as pd
-import requests
 from dotenv import load_dotenv
 from requests_ntlm import HttpNtlmAuth
 from auth import get_password
 from concurrent.futures import ThreadPoolExecutor, as_completed
-from unicodedata import normalize
-import urllib3
-
-urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
+from pl_http import SessionPool, sso_auth
+from pl_response_capture import capture_all
+from pl_response_store import ResponseStore, response_ref
+from pl_url_template import compile_template, clean_frame, clean_text
 
 # ------------------------- LOAD ENV -------------------------
 load_dotenv()
@@ -30,78 +28,157 @@ REQUEST_URL_JSON = os.path.join(REPORT_BASE, "request_urls.json")
 ERROR_LOG_EXCEL = os.path.join(REPORT_BASE, "RESPONSE_ERROR.xlsx")
 REQUEST_URL_EXCEL = os.path.join(REPORT_BASE, "REQUEST_URL_REFERENCE.xlsx")
 
+# ------------------------- MODE -----------------------------
+# probe:   reachability only - status line plus at most a byte of body
+# capture: full bodies streamed into the response store
+FETCH_MODE = os.getenv("FETCH_MODE", "probe").lower()
+# range: GET with "Range: bytes=0-0" | head: HEAD (falls back to range if refused)
+PROBE_METHOD = os.getenv("PROBE_METHOD", "range").lower()
+# Bodies up to this size are read to the end so the (NTLM-authenticated)
+# connection goes back to the pool; bigger ones are cut off
+PROBE_DRAIN_BYTES = 64 * 1024
+PER_HOST_CONCURRENCY = int(os.getenv("PER_HOST_CONCURRENCY", "8"))
+if FETCH_MODE not in ("probe", "capture"):
+    raise Exception(f"FETCH_MODE must be probe or capture, not {FETCH_MODE!r}")
+
 # ------------------------- SYSTEM NAME ----------------------
 with open(APITESTDATA_FILE, "r") as f:
     api_data = json.load(f)
 SYSTEM = api_data.get("System", "UNKNOWN")
-reporting_date = api_data.get("TestData", {}).get("default", {}).get("reportingDate", "")
+reporting_date = clean_text(api_data.get("TestData", {}).get("default", {}).get("reportingDate", ""))
+STORE = ResponseStore(os.path.join(REPORT_BASE, SYSTEM, "response_store"))
 
 # ------------------------- HELPERS --------------------------
-def clean(val):
-    return normalize("NFKC", str(val)).replace("\u00A0", "").replace("\u200B", "").strip()
-
-def build_url(template, param_dict):
-    url = template
-    for key, val in param_dict.items():
-        url = url.replace(f"{{{key}}}", val)
-    return url
-
-def send_request(tag, url, env):
+def _probe_get(pool, url):
+    """Ranged GET; servers that ignore Range answer 200 and are cut off after the headers."""
+    with pool.get(url, headers={"Range": "bytes=0-0"}, timeout=30, stream=True) as response:
+        length = response.headers.get("Content-Length")
+        if length is not None and length.isdigit() and int(length) <= PROBE_DRAIN_BYTES:
+            response.content  # small: drain, keeping the connection reusable
+        return response
+
+def probe_request(pool, case_id, tag, url, env):
+    """
+    Reachability check without downloading the payload: status line and
+    headers only. 206 (range honoured) counts as success like 200.
+    """
+    result = {"case_id": case_id, "tag": tag, "env": env, "status": "failed", "url": url, "error": None,
+              "http_status": None, "elapsed": None}
+    t0 = time.perf_counter()
     try:
-        headers = {"Accept": "application/json"}
-        response = requests.get(url, auth=AUTH, headers=headers, timeout=30, verify=False)
+        response = None
+        if PROBE_METHOD == "head":
+            with pool.request("HEAD", url, timeout=30) as response:
+                pass
+            if response.status_code in (405, 501):
+                response = None  # HEAD not supported here
+        if response is None:
+            response = _probe_get(pool, url)
+        result["http_status"] = response.status_code
         response.raise_for_status()
-        return {"tag": tag, "env": env, "status": "success", "url": url, "error": None}
+        result["status"] = "success"
     except Exception as e:
-        return {"tag": tag, "env": env, "status": "failed", "url": url, "error": str(e)}
+        result["error"] = str(e)
+    result["elapsed"] = time.perf_counter() - t0
+    return result
+
+def run_probes(requests_to_send):
+    """Probe (case_id, tag, url, env) requests on a bounded pool of keep-alive sessions."""
+    pool = SessionPool(AUTH, per_host=PER_HOST_CONCURRENCY, fallback_auth=sso_auth())
+    results = []
+    try:
+        # Two hosts (SOURCE, TARGET) x per-host limit: more threads would only queue on the pool
+        with ThreadPoolExecutor(max_workers=PER_HOST_CONCURRENCY * 2) as executor:
+            futures = [executor.submit(probe_request, pool, *request) for request in requests_to_send]
+            for future in as_completed(futures):
+                results.append(future.result())
+    finally:
+        pool.close()
+    return results
+
+def run_capture(requests_to_send):
+    """Fetch full bodies into STORE; SOURCE and TARGET of a test row go out together."""
+    cases, tags = {}, {}
+    for case_id, tag, url, env in requests_to_send:
+        cases.setdefault(case_id, []).append({"case_id": case_id, "env": env, "url": url})
+        tags[case_id] = tag
+    captured = capture_all(list(cases.values()), auth=AUTH, fallback_auth=sso_auth(),
+                           per_host=PER_HOST_CONCURRENCY, store=STORE)
+    results = []
+    for case_results in captured:
+        for r in case_results:
+            results.append({"case_id": r["case_id"], "tag": tags[r["case_id"]], "env": r["env"], "url": r["url"],
+                            "status": "failed" if r["error"] else "success", "error": r["error"],
+                            "http_status": r["status"], "elapsed": r["elapsed"],
+                            "response": response_ref(r["sha256"]) if r["sha256"] else ""})
+    return results
 
 # ------------------------- MAIN EXECUTION -------------------
 def main():
-    df = pd.read_excel(INPUT_TESTCASE_FILE)
+    # Every text cell is cleaned once here, not once per URL
+    df = clean_frame(pd.read_excel(INPUT_TESTCASE_FILE))
+    param_cols = [col for col in df.columns if col not in ["tag", "method", "endpoint"]]
     url_records = {}
     error_records = []
     excel_rows = []
+    requests_to_send = []
 
-    futures = []
-    executor = ThreadPoolExecutor()
-
-    for _, row in df.iterrows():
+    for idx, row in df.iterrows():
         tag = str(row.get("tag")).strip()
+        # One case per Excel row: a tag covers many endpoints, so it is only a label
+        case_id = f"{tag}_{idx:03d}"
         method = str(row.get("method")).strip().upper()
-        endpoint_template = clean(row.get("endpoint"))
+        endpoint_template = row.get("endpoint")
 
-        if method != "GET" or not endpoint_template:
+        if method != "GET" or pd.isna(endpoint_template) or not str(endpoint_template):
             continue
+        template = compile_template(str(endpoint_template))
 
         # Extract parameters
-        param_cols = [col for col in row.index if col not in ["tag", "method", "endpoint"]]
-        param_dict = {col: clean(row[col]) for col in param_cols if pd.notna(row[col]) and clean(row[col])}
-        if "reportingDate" in endpoint_template:
+        param_dict = {col: str(row[col]) for col in param_cols if pd.notna(row[col]) and str(row[col])}
+        if "reportingDate" in template.name_set:
             param_dict["reportingDate"] = reporting_date
 
         try:
-            source_base = clean(row.get("SourceBaseURL", "https://apw-lite01:21100"))
-            target_base = clean(row.get("TargetBaseURL", "https://aiw-riskrem02.uk.mizuho-sc.com:21100"))
-            source_url = f"{source_base}{build_url(endpoint_template, param_dict)}"
-            target_url = f"{target_base}{build_url(endpoint_template, param_dict)}"
+            source_base = str(row.get("SourceBaseURL", "https://apw-lite01:21100"))
+            target_base = str(row.get("TargetBaseURL", "https://aiw-riskrem02.uk.mizuho-sc.com:21100"))
+            path = template.render(param_dict)
+            source_url = source_base + path
+            target_url = target_base + path
 
             url_records[tag] = {
                 "SOURCE_FinalURL": source_url,
                 "TARGET_FinalURL": target_url
             }
 
-            excel_rows.append({"TagName": tag, "SOURCE_FinalURL": source_url, "TARGET_FinalURL": target_url})
+            excel_rows.append({"TestCaseID": case_id, "TagName": tag,
+                               "SOURCE_FinalURL": source_url, "TARGET_FinalURL": target_url})
 
-            # Launch requests in parallel
-            futures.append(executor.submit(send_request, tag, source_url, "SOURCE"))
-            futures.append(executor.submit(send_request, tag, target_url, "TARGET"))
+            requests_to_send.append((case_id, tag, source_url, "SOURCE"))
+            requests_to_send.append((case_id, tag, target_url, "TARGET"))
 
         except Exception as ex:
             error_records.append({"TagName": tag, "Endpoint": endpoint_template, "Error": f"URL_BUILD_FAILED: {str(ex)}"})
 
-    # Wait for responses
-    for future in as_completed(futures):
-        result = future.result()
+    # Send requests in parallel: probe (reachability) or capture (bodies)
+    print(f"Sending {len(requests_to_send)} requests in {FETCH_MODE} mode...")
+    t0 = time.perf_counter()
+    if FETCH_MODE == "capture":
+        results = run_capture(requests_to_send)
+    else:
+        results = run_probes(requests_to_send)
+    print(f"Done in {time.perf_counter() - t0:.1f}s")
+
+    by_request = {(r["case_id"], r["env"]): r for r in results}
+    for excel_row in excel_rows:
+        for env in ("SOURCE", "TARGET"):
+            r = by_request.get((excel_row["TestCaseID"], env))
+            if r is not None:
+                excel_row[f"{env}_Status"] = r["http_status"]
+                if FETCH_MODE == "capture":
+                    excel_row[f"{env}_Response"] = r["response"]
+
+    for result in results:
         if result["status"] == "failed":
             error_records.append({
                 "TagName": result["tag"],
@@ -0,0 +1,187 @@
+import os
+import json
+import gzip
+import time
+import uuid
+import shutil
+import hashlib
+import threading
+
+# -------------------- CONFIG --------------------
+CHUNK_SIZE = 256 * 1024
+COMPRESS_LEVEL = 5
+HASH_PREFIX = "sha256:"
+# Report side of each captured env: SOURCE/TARGET (pl_* capture) and PRD/UAT (extract_save_response)
+SIDES = {"SOURCE": "Source", "PRD": "Source", "TARGET": "Target", "UAT": "Target"}
+
+
+class ResponseStore:
+    """
+    Content-addressed, gzip-compressed store for captured response bodies.
+
+        <root>/objects/ab/<sha256>.gz   one object per distinct body
+        <root>/index.jsonl              one line per captured request:
+                                        run_id, case_id, env, endpoint, method,
+                                        url, request_headers, status, headers,
+                                        sha256, size, content_type,
+                                        dns, connect, tls, ttfb, elapsed, error
+
+    The hash is taken over the raw (uncompressed) body, so identical responses
+    from SOURCE and TARGET, or from earlier runs, are stored once and compare
+    equal by hash alone. The index doubles as the request log that
+    pl_mock_server replays.
+    """
+
+    def __init__(self, root, run_id=None):
+        self.root = root
+        self.objects_dir = os.path.join(root, "objects")
+        self.index_path = os.path.join(root, "index.jsonl")
+        self.run_id = run_id or time.strftime("%Y%m%d_%H%M%S")
+        self._index_lock = threading.Lock()
+        os.makedirs(self.objects_dir, exist_ok=True)
+
+    # -------------------- OBJECTS --------------------
+    def object_path(self, sha256):
+        return os.path.join(self.objects_dir, sha256[:2], f"{sha256}.gz")
+
+    def has(self, sha256):
+        return bool(sha256) and os.path.exists(self.object_path(sha256))
+
+    def put_stream(self, resp, chunk_size=CHUNK_SIZE):
+        """
+        Stream a requests response body into the store while hashing it.
+        A body already present is not written again.
+        """
+        digest = hashlib.sha256()
+        size = 0
+        tmp_path = os.path.join(self.objects_dir, f".{uuid.uuid4().hex}.part")
+        try:
+            with gzip.open(tmp_path, "wb", compresslevel=COMPRESS_LEVEL) as f:
+                for chunk in resp.iter_content(chunk_size=chunk_size):
+                    if chunk:
+                        f.write(chunk)
+                        digest.update(chunk)
+                        size += len(chunk)
+
+            sha256 = digest.hexdigest()
+            final_path = self.object_path(sha256)
+            if os.path.exists(final_path):
+                os.remove(tmp_path)
+            else:
+                os.makedirs(os.path.dirname(final_path), exist_ok=True)
+                os.replace(tmp_path, final_path)
+        except Exception:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+        return {
+            "content_type": resp.headers.get("Content-Type", ""),
+            "size": size,
+            "sha256": sha256,
+        }
+
+    def open(self, sha256):
+        """Binary file object over the decompressed body."""
+        return gzip.open(self.object_path(sha256), "rb")
+
+    def size(self, sha256):
+        """Uncompressed body size, read from the gzip trailer (exact below 4 GiB)."""
+        with open(self.object_path(sha256), "rb") as f:
+            f.seek(-4, os.SEEK_END)
+            return int.from_bytes(f.read(4), "little")
+
+    def load_json(self, sha256):
+        with self.open(sha256) as f:
+            return json.load(f)
+
+    def export(self, sha256, out_path):
+        """Write a stored body back out as a plain file."""
+        with self.open(sha256) as src, open(out_path, "wb") as dst:
+            shutil.copyfileobj(src, dst, CHUNK_SIZE)
+
+    # -------------------- INDEX --------------------
+    def record(self, result):
+        """Append one capture result (the engine's result dict) to the index."""
+        entry = {
+            "run_id": self.run_id,
+            "case_id": result.get("case_id"),
+            "env": result.get("env"),
+            "endpoint": result.get("endpoint"),
+            "method": result.get("method", "GET"),
+            "url": result.get("url"),
+            "request_headers": result.get("request_headers"),
+            "status": result.get("status"),
+            "headers": result.get("headers"),
+            "sha256": result.get("sha256"),
+            "size": result.get("size"),
+            "content_type": result.get("content_type"),
+            "dns": result.get("dns"),
+            "connect": result.get("connect"),
+            "tls": result.get("tls"),
+            "ttfb": result.get("ttfb"),
+            "elapsed": result.get("elapsed"),
+            "error": result.get("error"),
+        }
+        line = json.dumps(entry, ensure_ascii=False, default=str)
+        with self._index_lock:
+            with open(self.index_path, "a", encoding="utf-8") as f:
+                f.write(line + "\n")
+
+    def entries(self, run_id=None):
+        """Index entries, optionally only those of one run."""
+        if not os.path.exists(self.index_path):
+            return
+        with open(self.index_path, "r", encoding="utf-8") as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                entry = json.loads(line)
+                if run_id is None or entry.get("run_id") == run_id:
+                    yield entry
+
+    def latest(self, run_id=None):
+        """{(case_id, env): entry} keeping the most recent capture of each."""
+        latest = {}
+        for entry in self.entries(run_id):
+            latest[(entry["case_id"], entry["env"])] = entry
+        return latest
+
+    def last_run_id(self):
+        last = None
+        for entry in self.entries():
+            last = entry.get("run_id")
+        return last
+
+    def comparison_rows(self, run_id=None):
+        """
+        One row per case of `run_id` (default: the latest run) in the columns
+        the comparators read from Excel - TestCaseID, Source/TargetRequestURL,
+        Source/TargetResponse ('sha256:...' refs, empty when the capture
+        failed). Cases come in capture order; a case captured twice keeps its
+        latest entries.
+        """
+        run_id = run_id or self.last_run_id()
+        rows = {}
+        for (case_id, env), entry in self.latest(run_id).items():
+            side = SIDES.get(str(env or "").upper())
+            if side is None:
+                continue
+            row = rows.setdefault(case_id, {"TestCaseID": case_id, "TagName": "",
+                                            "SourceRequestURL": "", "TargetRequestURL": "",
+                                            "SourceResponse": "", "TargetResponse": ""})
+            row[f"{side}RequestURL"] = entry.get("url") or ""
+            row[f"{side}Response"] = response_ref(entry.get("sha256")) if not entry.get("error") else ""
+        return list(rows.values())
+
+
+# -------------------- RESPONSE REFERENCES --------------------
+def response_ref(sha256):
+    """Value written to report columns for a stored body, e.g. 'sha256:ab12...'"""
+    return f"{HASH_PREFIX}{sha256}" if sha256 else ""
+
+
+def parse_ref(ref):
+    """sha256 of a 'sha256:...' reference, or None for a plain file name."""
+    ref = str(ref or "").strip()
+    return ref[len(HASH_PREFIX):] if ref.startswith(HASH_PREFIX) else None
@@ -1,9 +1,9 @@
 import os
 import json
-import itertools
 import pandas as pd
 from dotenv import load_dotenv
-from unicodedata import normalize
+from pl_pairwise import iter_combinations, coverage_strength, full_size
+from pl_url_template import compile_template, clean_text
 
 # -------------------- CONFIG --------------------
 load_dotenv()
@@ -15,12 +15,21 @@ API_TESTDATA_FILE = os.path.join("API", "ApiTestData.json")
 SOURCE_SHEET = "SOURCE"
 TARGET_SHEET = "TARGET"
 
+# full | pairwise | 3-wise ... (see pl_pairwise)
+COVERAGE_MODE = os.getenv("COVERAGE_MODE", "full")
+coverage_strength(COVERAGE_MODE)  # fail fast on a typo
+
 SOURCE_BASEURL = os.getenv("SOURCE_BASEURL")
 TARGET_BASEURL = os.getenv("TARGET_BASEURL")
 
 if not SOURCE_BASEURL or not TARGET_BASEURL:
     raise Exception("SOURCE_BASEURL / TARGET_BASEURL missing in .env")
 
+# Cleaned once here; templates and values are cleaned as they are loaded, so
+# URLs are only ever concatenated
+SOURCE_BASEURL = clean_text(SOURCE_BASEURL)
+TARGET_BASEURL = clean_text(TARGET_BASEURL)
+
 
 # -------------------- HELPERS --------------------
 def load_reporting_date():
@@ -31,27 +40,19 @@ def load_reporting_date():
 def parse_values(value):
     if pd.isna(value) or str(value).strip() == "":
         return []
-    return [v.strip() for v in str(value).split(",") if v.strip()]
-
-def extract_path_params(endpoint):
-    return [
-        p.strip("{}")
-        for p in endpoint.split("/")
-        if p.startswith("{") and p.endswith("}")
-    ]
-
-def resolve_endpoint(endpoint, param_map):
-    for k, v in param_map.items():
-        endpoint = endpoint.replace(f"{{{k}}}", v)
-    return endpoint
-
-def clean_url(url):
-    return normalize("NFKC", str(url)).replace("\u00A0", "").replace("\u200B", "").strip()
+    cleaned = (clean_text(v) for v in str(value).split(","))
+    return [v for v in cleaned if v]
 
 
 # -------------------- CORE LOGIC --------------------
-def main():
-    reporting_date = load_reporting_date()
+def iter_test_cases(stats=None):
+    """
+    Yields one test case row at a time (TestCaseID, TagName, base and request
+    URLs), so a consumer such as pl_pipeline can start fetching while later
+    endpoints are still being expanded. `stats`, if given, receives
+    "full_total": the size of the full product across all endpoints.
+    """
+    reporting_date = clean_text(load_reporting_date())
 
     source_df = pd.read_excel(ENDPOINTS_FILE, sheet_name=SOURCE_SHEET)
     target_df = pd.read_excel(ENDPOINTS_FILE, sheet_name=TARGET_SHEET)
@@ -63,21 +64,21 @@ def main():
         suffixes=("_SOURCE", "_TARGET")
     )
 
-    test_rows = []
     test_counter = {}
+    if stats is not None:
+        stats["full_total"] = 0
 
     for _, row in merged.iterrows():
-        endpoint_template = row["endpoint"]
+        template = compile_template(clean_text(row["endpoint"]))
         tag = row["tag"]
         method = row["method"]
 
         if method != "GET":
             continue
 
-        path_params = extract_path_params(endpoint_template)
         param_values = {}
 
-        for p in path_params:
+        for p in template.names:
             if p == "reportingDate":
                 param_values[p] = [reporting_date]
             else:
@@ -90,34 +91,47 @@ def main():
         if not param_values:
             continue
 
-        keys = list(param_values.keys())
-        combinations = itertools.product(*param_values.values())
+        if stats is not None:
+            stats["full_total"] += full_size(param_values)
 
-        for combo in combinations:
-            param_map = dict(zip(keys, combo))
-            resolved_endpoint = resolve_endpoint(endpoint_template, param_map)
+        # Full product: value tuples go straight into the compiled template
+        if coverage_strength(COVERAGE_MODE) is None:
+            endpoints = template.render_all(param_values)
+        else:
+            endpoints = (template.render(param_map)
+                         for param_map in iter_combinations(param_values, COVERAGE_MODE))
 
-            source_url = clean_url(f"{SOURCE_BASEURL}{resolved_endpoint}")
-            target_url = clean_url(f"{TARGET_BASEURL}{resolved_endpoint}")
+        for resolved_endpoint in endpoints:
+            source_url = SOURCE_BASEURL + resolved_endpoint
+            target_url = TARGET_BASEURL + resolved_endpoint
 
             tag_key = tag
             test_counter[tag_key] = test_counter.get(tag_key, 0) + 1
             test_case_id = f"{tag}_{test_counter[tag_key]:03d}"
 
-            test_rows.append({
+            yield {
                 "TestCaseID": test_case_id,
                 "TagName": tag,
                 "SourceBaseURL": SOURCE_BASEURL,
                 "TargetBaseURL": TARGET_BASEURL,
                 "SourceRequestURL": source_url,
                 "TargetRequestURL": target_url,
-            })
+            }
+
 
+def write_test_cases(test_rows, output_file=OUTPUT_FILE):
     result_df = pd.DataFrame(test_rows)
-    os.makedirs(os.path.dirname(OUTPUT_FILE), exist_ok=True)
-    result_df.to_excel(OUTPUT_FILE, index=False)
+    os.makedirs(os.path.dirname(output_file), exist_ok=True)
+    result_df.to_excel(output_file, index=False)
+
+
+def main():
+    stats = {}
+    test_rows = list(iter_test_cases(stats))
+    write_test_cases(test_rows)
 
     print(f"Baselined test cases generated → {OUTPUT_FILE}")
+    print(f"Coverage mode {COVERAGE_MODE}: {len(test_rows)} test cases (full product: {stats['full_total']})")
 
 
 if __name__ == "__main__":
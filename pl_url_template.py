@@ -0,0 +1,127 @@
+import re
+import itertools
+from unicodedata import normalize
+
+# -------------------- CONFIG --------------------
+PLACEHOLDER = re.compile(r"\{([^{}]+)\}")
+_templates = {}
+
+
+# -------------------- CLEANING --------------------
+def clean_text(value):
+    """NFKC-normalise and drop non-breaking / zero-width spaces that come in from Excel."""
+    return normalize("NFKC", str(value)).replace("\u00A0", "").replace("\u200B", "").strip()
+
+
+def clean_frame(df, columns=None):
+    """
+    Clean every string cell of `df` (or just `columns`) once, at load time.
+    Each distinct value is normalised once however many rows repeat it, so
+    nothing downstream needs to clean per URL. NaN and non-string cells are
+    left as they are. Returns df (modified in place).
+    """
+    seen = {}
+
+    def clean_cell(value):
+        if not isinstance(value, str):
+            return value
+        if value not in seen:
+            seen[value] = clean_text(value)
+        return seen[value]
+
+    for col in columns if columns is not None else df.columns:
+        if df[col].dtype == object:
+            df[col] = df[col].map(clean_cell)
+    return df
+
+
+# -------------------- TEMPLATES --------------------
+class UrlTemplate:
+    """
+    An endpoint template such as "/risk/{book}/trades/{reportingDate}" parsed
+    once into literal segments and placeholders, and compiled to format
+    strings: rendering one URL is a single C-level format call instead of a
+    str.replace per parameter, and render_all() feeds value tuples straight
+    into the positional form.
+
+    Placeholders without a value stay as "{name}" in the output, the same as
+    the old replace loops did.
+    """
+
+    __slots__ = ("template", "names", "name_set", "_named", "_positional")
+
+    def __init__(self, template):
+        self.template = template
+        parts = PLACEHOLDER.split(template)
+        literals, placeholders = parts[0::2], parts[1::2]
+        # Unique names in order of first appearance; a repeated name reuses its slot
+        self.names = list(dict.fromkeys(placeholders))
+        self.name_set = frozenset(self.names)
+        slot = {name: i for i, name in enumerate(self.names)}
+        positional, named = [_escape(literals[0])], [_escape(literals[0])]
+        for name, literal in zip(placeholders, literals[1:]):
+            positional.append(f"{{{slot[name]}}}")
+            # Lookup by name needs a plain identifier; anything else goes through slots
+            named.append(f"{{{name}}}" if name.isidentifier() else f"{{{_slot_key(slot[name])}}}")
+            positional.append(_escape(literal))
+            named.append(_escape(literal))
+        self._positional = "".join(positional)
+        self._named = "".join(named)
+
+    def render(self, params, prefix=""):
+        """`prefix` (e.g. a base URL) + template with `params` ({name: value}) substituted."""
+        if not self.names:
+            return prefix + self.template
+        try:
+            return prefix + self._named.format_map(params)
+        except KeyError:
+            return prefix + self._named.format_map(_Keep(params, self.names))
+
+    def render_all(self, values_by_name, prefix=""):
+        """
+        Lazily renders every combination of `values_by_name` ({name: [values]}),
+        in itertools.product order. Names the template lacks are ignored; the
+        ones it has but that are not given stay as placeholders.
+        """
+        fmt = _escape(prefix) + self._positional
+        columns = [
+            values_by_name[name] if name in values_by_name else [f"{{{name}}}"]
+            for name in self.names
+        ]
+        return (fmt.format(*combo) for combo in itertools.product(*columns))
+
+    def split_params(self, params):
+        """(path params, query params): path params are the ones the template names."""
+        path, query = {}, {}
+        for key, value in params.items():
+            (path if key in self.name_set else query)[key] = value
+        return path, query
+
+
+def _escape(literal):
+    return literal.replace("{", "{{").replace("}", "}}")
+
+
+def _slot_key(index):
+    return f"_slot{index}"
+
+
+class _Keep(dict):
+    """format_map mapping for a partial parameter set: unknown placeholders render as themselves."""
+
+    def __init__(self, params, names):
+        super().__init__(params)
+        for i, name in enumerate(names):
+            if not name.isidentifier():
+                self[_slot_key(i)] = params.get(name, f"{{{name}}}")
+
+    def __missing__(self, key):
+        return f"{{{key}}}"
+
+
+def compile_template(template):
+    """Cached UrlTemplate per template string."""
+    tmpl = _templates.get(template)
+    if tmpl is None:
+        tmpl = _templates[template] = UrlTemplate(template)
+    return tmpl
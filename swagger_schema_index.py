@@ -0,0 +1,122 @@
+"""
+OpenAPI schema index.
+
+Built once per swagger document. Every `#/components/...` (and Swagger 2
+`#/definitions/...`) entry is resolved up front, and enum sets are cached per
+schema node, so parameters that share a schema never walk it twice.
+`$ref` chains and allOf/oneOf/anyOf recursion are guarded against cycles.
+"""
+
+REF_SECTIONS = ("components", "definitions")
+COMBINATORS = ("allOf", "oneOf", "anyOf")
+
+
+class SchemaIndex:
+    def __init__(self, openapi):
+        self.openapi = openapi or {}
+        self._refs = {}
+        self._enums = {}
+        self._build()
+
+    # ================= REF RESOLUTION =================
+    def _build(self):
+        """Pre-resolve every named component so lookups are a single dict hit."""
+        components = self.openapi.get("components", {})
+        if isinstance(components, dict):
+            for section, entries in components.items():
+                if not isinstance(entries, dict):
+                    continue
+                for name, node in entries.items():
+                    self._refs[f"#/components/{section}/{name}"] = node
+
+        definitions = self.openapi.get("definitions", {})
+        if isinstance(definitions, dict):
+            for name, node in definitions.items():
+                self._refs[f"#/definitions/{name}"] = node
+
+    def _walk(self, ref):
+        node = self.openapi
+        for part in ref[2:].split("/"):
+            part = part.replace("~1", "/").replace("~0", "~")
+            if not isinstance(node, dict):
+                return {}
+            node = node.get(part, {})
+        return node
+
+    def resolve_ref(self, ref):
+        """Return the dict a `#/...` ref points at, following `$ref` chains."""
+        if not ref or not ref.startswith("#/"):
+            return {}
+
+        seen = set()
+        node = {"$ref": ref}
+        while isinstance(node, dict) and "$ref" in node:
+            ref = node["$ref"]
+            if ref in seen or not isinstance(ref, str) or not ref.startswith("#/"):
+                return {}
+            seen.add(ref)
+            if ref not in self._refs:
+                self._refs[ref] = self._walk(ref)
+            node = self._refs[ref]
+
+        return node if isinstance(node, dict) else {}
+
+    def resolve(self, schema):
+        """Return the schema itself, or its `$ref` target."""
+        if not isinstance(schema, dict):
+            return {}
+        if "$ref" in schema:
+            return self.resolve_ref(schema["$ref"])
+        return schema
+
+    # ================= ENUM EXTRACTION =================
+    def _enum_tuple(self, schema, active):
+        """
+        (enum values, cut): `cut` is the stack depth of the shallowest ancestor
+        a cycle below this schema was cut off at, or None. Such a result lacks
+        what that ancestor contributes, so it is only cached when no cycle was
+        cut above this schema; `active` maps schemas being expanded to depth.
+        """
+        schema = self.resolve(schema)
+        if not schema:
+            return (), None
+
+        key = id(schema)
+        if key in self._enums:
+            return self._enums[key], None
+        if key in active:
+            # Recursive schema: the branch currently being expanded
+            # contributes nothing new on re-entry.
+            return (), active[key]
+
+        depth = len(active)
+        active[key] = depth
+        cut = None
+        try:
+            if "enum" in schema:
+                result = tuple(schema["enum"])
+            else:
+                result = ()
+                for combinator in COMBINATORS:
+                    if combinator in schema:
+                        enums = []
+                        for sub in schema[combinator]:
+                            values, sub_cut = self._enum_tuple(sub, active)
+                            enums.extend(values)
+                            # A cycle back to this schema itself loses nothing
+                            if sub_cut is not None and sub_cut < depth:
+                                cut = sub_cut if cut is None else min(cut, sub_cut)
+                        result = tuple(dict.fromkeys(enums))
+                        break
+        finally:
+            del active[key]
+
+        if cut is None:
+            self._enums[key] = result
+        return result, cut
+
+    def enums(self, schema):
+        """Enum values of a (possibly referenced / composed) schema."""
+        if not schema:
+            return []
+        return list(self._enum_tuple(schema, {})[0])
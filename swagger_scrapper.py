@@ -2,6 +2,7 @@ import asyncio
 from playwright.async_api import async_playwright
 import pandas as pd
 import os
+from swagger_spec_extractor import extract_endpoints_from_ui
 
 async def scrape_swagger_endpoints(page, url, label):
     """
@@ -59,9 +60,46 @@ async def scrape_swagger_endpoints(page, url, label):
         print(f"   [{label}] ❌ Error scraping: {e}")
         return []
 
+def spec_endpoints(url, label):
+    """GET endpoints parsed from the spec behind the Swagger UI, in the scraper's row shape."""
+    rows = extract_endpoints_from_ui(url, with_summary=True)
+    data = {}
+    for row in rows:
+        data.setdefault(row["endpoint"], {
+            "Endpoint": row["endpoint"],
+            "Method": row["method"],
+            "Description": row["summary"]
+        })
+    print(f"   [{label}] 🎉 Parsed spec! Total GET Endpoints captured: {len(data)}")
+    return list(data.values())
+
 async def run(dev_url, prod_url, output_file):
     print(f"--- Starting Scraper ---")
-    
+
+    # 0. Parse the spec directly; the browser is only a fallback
+    try:
+        dev_data = await asyncio.to_thread(spec_endpoints, dev_url, "DEV")
+    except Exception as e:
+        print(f"   [DEV] ⚠️ Spec parsing failed ({e}), falling back to Swagger UI scraping")
+        dev_data = None
+
+    if dev_data is None:
+        dev_data = await scrape_with_browser(dev_url)
+
+    # 3. Save to Excel
+    if dev_data:
+        print(f"--- Saving {len(dev_data)} endpoints to Excel ---")
+        df = pd.DataFrame(dev_data)
+        
+        # We explicitly name the sheet 'SOURCE' because test_generator expects it
+        with pd.ExcelWriter(output_file) as writer:
+            df.to_excel(writer, sheet_name='SOURCE', index=False)
+            
+        print(f"✅ Metadata saved to: {output_file}")
+    else:
+        print("⚠️ No data found. Excel not created.")
+
+async def scrape_with_browser(dev_url):
     async with async_playwright() as p:
         # Headless=False so you can see it working (Change to True to hide it)
         browser = await p.chromium.launch(headless=False) 
@@ -77,16 +115,5 @@ async def run(dev_url, prod_url, output_file):
         # prod_data = await scrape_swagger_endpoints(page, prod_url, "PROD")
         
         await browser.close()
-        
-    # 3. Save to Excel
-    if dev_data:
-        print(f"--- Saving {len(dev_data)} endpoints to Excel ---")
-        df = pd.DataFrame(dev_data)
-        
-        # We explicitly name the sheet 'SOURCE' because test_generator expects it
-        with pd.ExcelWriter(output_file) as writer:
-            df.to_excel(writer, sheet_name='SOURCE', index=False)
-            
-        print(f"✅ Metadata saved to: {output_file}")
-    else:
-        print("⚠️ No data found. Excel not created.")
+
+    return dev_data
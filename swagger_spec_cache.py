@@ -0,0 +1,121 @@
+"""
+Local swagger.json cache with conditional GET.
+
+One entry per swagger URL under the cache folder:
+    <key>.meta.json   ETag / Last-Modified / sha256 of the last body
+    <key>.spec.json   raw spec bytes
+    <key>.rows.json   endpoint rows extracted from that spec, per context
+
+`fetch` sends If-None-Match / If-Modified-Since. A 304, or a 200 whose body
+hashes the same as last time, comes back with `changed=False` so callers can
+reuse the rows they extracted before instead of re-parsing the spec.
+"""
+import os
+import json
+import hashlib
+
+import requests
+
+DEFAULT_CACHE_DIR = os.path.join("shared", "cache", "swagger")
+
+
+class SpecFetch:
+    def __init__(self, url, status_code, changed, path, error=None):
+        self.url = url
+        self.status_code = status_code
+        self.changed = changed
+        self.error = error
+        self._path = path
+        self._spec = None
+
+    @property
+    def ok(self):
+        return self.error is None
+
+    def json(self):
+        """Parse the cached spec lazily - unchanged specs with cached rows never pay for it."""
+        if self._spec is None:
+            with open(self._path, "r", encoding="utf-8") as f:
+                self._spec = json.load(f)
+        return self._spec
+
+
+class SpecCache:
+    def __init__(self, cache_dir=DEFAULT_CACHE_DIR):
+        self.cache_dir = cache_dir
+        os.makedirs(cache_dir, exist_ok=True)
+
+    # ================= PATHS / IO =================
+    def _base(self, url):
+        key = hashlib.sha1(url.encode("utf-8")).hexdigest()
+        return os.path.join(self.cache_dir, key)
+
+    @staticmethod
+    def _read_json(path, default):
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return default
+
+    @staticmethod
+    def _write(path, data, binary=False):
+        tmp = f"{path}.tmp"
+        if binary:
+            with open(tmp, "wb") as f:
+                f.write(data)
+        else:
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(data, f, ensure_ascii=False, default=str)
+        os.replace(tmp, path)
+
+    # ================= FETCH =================
+    def fetch(self, url, auth=None, timeout=60, session=None):
+        base = self._base(url)
+        meta_path, spec_path = f"{base}.meta.json", f"{base}.spec.json"
+        meta = self._read_json(meta_path, {})
+        cached = bool(meta) and os.path.exists(spec_path)
+
+        headers = {"Accept": "application/json"}
+        if cached and meta.get("etag"):
+            headers["If-None-Match"] = meta["etag"]
+        if cached and meta.get("last_modified"):
+            headers["If-Modified-Since"] = meta["last_modified"]
+
+        http = session or requests
+        resp = http.get(url, auth=auth, headers=headers, timeout=timeout, verify=False)
+
+        if resp.status_code == 304 and cached:
+            return SpecFetch(url, 304, False, spec_path)
+        if resp.status_code != 200:
+            return SpecFetch(url, resp.status_code, True, spec_path, error=f"HTTP {resp.status_code}")
+
+        body = resp.content
+        digest = hashlib.sha256(body).hexdigest()
+        changed = not (cached and meta.get("sha256") == digest)
+
+        if changed:
+            self._write(spec_path, body, binary=True)
+            rows_path = f"{base}.rows.json"
+            if os.path.exists(rows_path):
+                os.remove(rows_path)
+
+        self._write(meta_path, {
+            "url": url,
+            "etag": resp.headers.get("ETag"),
+            "last_modified": resp.headers.get("Last-Modified"),
+            "sha256": digest,
+            "size": len(body),
+        })
+        return SpecFetch(url, 200, changed, spec_path)
+
+    # ================= EXTRACTED ROWS =================
+    def load_rows(self, url, context):
+        """Rows previously extracted from this URL's spec, or None."""
+        return self._read_json(f"{self._base(url)}.rows.json", {}).get(context)
+
+    def save_rows(self, url, context, rows):
+        rows_path = f"{self._base(url)}.rows.json"
+        all_rows = self._read_json(rows_path, {})
+        all_rows[context] = rows
+        self._write(rows_path, all_rows)
@@ -0,0 +1,189 @@
+"""
+Endpoint extraction straight from the OpenAPI document behind a Swagger UI page.
+
+Instead of driving Chromium through every `.opblock`, find the spec URL the UI
+itself loads (inline config, swagger-initializer.js / index.js, configUrl, or
+the usual spec paths) and parse the JSON. Rows use the endpoints.xlsx layout:
+    tag | method | endpoint | <param> = "A, B, C" (enum values, "" if none)
+One row per (tag, operation), the same way Swagger UI lists an operation under
+each of its tags.
+"""
+import re
+import json
+from urllib.parse import urljoin, urlparse
+
+import requests
+
+from swagger_schema_index import SchemaIndex
+
+# Spec locations tried when the UI page does not say where its spec lives
+SPEC_PATHS = (
+    "swagger/v1/swagger.json",
+    "v3/api-docs",
+    "v2/api-docs",
+    "swagger.json",
+    "openapi.json",
+)
+INIT_SCRIPTS = ("swagger-initializer.js", "swagger-ui-init.js", "index.js")
+HTTP_METHODS = ("get", "put", "post", "delete", "options", "head", "patch", "trace")
+
+URL_PATTERN = re.compile(r"""["']?(url|configUrl)["']?\s*:\s*["']([^"']+)["']""")
+SCRIPT_PATTERN = re.compile(r"""<script[^>]+src\s*=\s*["']([^"']+)["']""", re.IGNORECASE)
+
+
+# ================= SPEC DISCOVERY =================
+def _get(http, url, auth, timeout):
+    return http.get(url, auth=auth, timeout=timeout, verify=False)
+
+
+def _as_json(resp):
+    if resp.status_code != 200:
+        return None
+    try:
+        return resp.json()
+    except ValueError:
+        return None
+
+
+def spec_url_candidates(page_url, text):
+    """Absolute spec / config URLs referenced in a Swagger UI page or init script."""
+    for kind, value in URL_PATTERN.findall(text or ""):
+        if value.startswith(("http://", "https://", "/", ".")) or value.endswith(".json") or "api-docs" in value:
+            yield kind, urljoin(page_url, value)
+
+
+def find_spec(ui_url, auth=None, session=None, timeout=30):
+    """
+    Locate and load the OpenAPI document behind a Swagger UI URL.
+    Returns (spec_url, openapi_dict); raises ValueError if nothing is found.
+    """
+    http = session or requests
+    tried = set()
+
+    def load(url):
+        if url in tried:
+            return None
+        tried.add(url)
+        try:
+            return _as_json(_get(http, url, auth, timeout))
+        except requests.RequestException:
+            return None
+
+    def follow(kind, url):
+        doc = load(url)
+        if not isinstance(doc, dict):
+            return None, None
+        if "paths" in doc:
+            return url, doc
+        if kind == "configUrl":
+            # springdoc swagger-config: {"url": ...} or {"urls": [{"url": ...}]}
+            targets = [doc.get("url")] + [u.get("url") for u in doc.get("urls", []) if isinstance(u, dict)]
+            for target in filter(None, targets):
+                found = follow("url", urljoin(url, target))
+                if found[1]:
+                    return found
+        return None, None
+
+    # 1. The URL may already be the spec
+    page_url = ui_url.split("#", 1)[0]
+    resp = _get(http, page_url, auth, timeout)
+    doc = _as_json(resp) if "json" in resp.headers.get("Content-Type", "") else None
+    if isinstance(doc, dict) and "paths" in doc:
+        return page_url, doc
+
+    # 2. Config inlined in the page, then in the init scripts it loads
+    texts = [(page_url, resp.text if resp.status_code == 200 else "")]
+    for src in SCRIPT_PATTERN.findall(texts[0][1]):
+        script_url = urljoin(page_url, src)
+        if urlparse(script_url).path.rsplit("/", 1)[-1] in INIT_SCRIPTS:
+            try:
+                script = _get(http, script_url, auth, timeout)
+                texts.append((script_url, script.text if script.status_code == 200 else ""))
+            except requests.RequestException:
+                continue
+
+    for base, text in texts:
+        for kind, url in spec_url_candidates(base, text):
+            found = follow(kind, url)
+            if found[1]:
+                return found
+
+    # 3. Well-known spec paths, relative to the page and to the host root
+    root = f"{urlparse(page_url).scheme}://{urlparse(page_url).netloc}/"
+    page_dir = page_url if page_url.endswith("/") else page_url.rsplit("/", 1)[0] + "/"
+    for base in (page_dir, root):
+        for path in SPEC_PATHS:
+            found = follow("url", urljoin(base, path))
+            if found[1]:
+                return found
+
+    raise ValueError(f"No OpenAPI document found behind {ui_url}")
+
+
+# ================= SPEC PARSING =================
+def _param_enums(param, index):
+    """Enum values the UI would show under 'Available values' for a parameter."""
+    schema = index.resolve(param.get("schema", {}))
+    enums = index.enums(schema)
+    if not enums and isinstance(schema.get("items"), dict):
+        enums = index.enums(schema["items"])
+    if not enums:
+        # Swagger 2 keeps enum / items on the parameter itself
+        enums = list(param.get("enum", [])) or index.enums(param.get("items", {}))
+    return enums
+
+
+def _clean_text(value):
+    return " ".join(str(value).split())
+
+
+def parse_spec(openapi, methods=("GET",), with_summary=False):
+    """
+    Endpoint rows (endpoints.xlsx layout) for the given HTTP methods.
+    with_summary adds the operation summary as a "summary" column.
+    """
+    index = SchemaIndex(openapi)
+    wanted = {m.lower() for m in methods} if methods else set(HTTP_METHODS)
+    rows = []
+
+    for path, path_item in openapi.get("paths", {}).items():
+        path_item = index.resolve(path_item)
+        shared = path_item.get("parameters", [])
+
+        for method, op in path_item.items():
+            if method not in HTTP_METHODS or method not in wanted or not isinstance(op, dict):
+                continue
+
+            # Operation parameters override path-level ones with the same (name, in)
+            params = {}
+            for p in list(shared) + list(op.get("parameters", [])):
+                p = index.resolve(p)
+                if p.get("name"):
+                    params[(p["name"], p.get("in"))] = p
+
+            param_values = {}
+            for (name, _), p in params.items():
+                enums = _param_enums(p, index)
+                param_values[name] = ", ".join(_clean_text(v) for v in enums)
+
+            for tag in op.get("tags") or ["default"]:
+                row = {"tag": tag, "method": method.upper(), "endpoint": path}
+                if with_summary:
+                    row["summary"] = _clean_text(op.get("summary", ""))
+                row.update(param_values)
+                rows.append(row)
+
+    return rows
+
+
+def extract_endpoints_from_ui(ui_url, auth=None, session=None, methods=("GET",), timeout=30, with_summary=False):
+    """Find the spec behind a Swagger UI page and return its endpoint rows."""
+    spec_url, openapi = find_spec(ui_url, auth=auth, session=session, timeout=timeout)
+    print(f"Parsed spec {spec_url}")
+    return parse_spec(openapi, methods=methods, with_summary=with_summary)
+
+
+if __name__ == "__main__":
+    import sys
+    for row in extract_endpoints_from_ui(sys.argv[1]):
+        print(json.dumps(row))
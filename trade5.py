@@ -1,28 +1,15 @@
 import os
-import subprocess
 import pandas as pd
 import xml.etree.ElementTree as ET
+from pl_http import shared_session, XML_HEADERS
 
 
 def fetch_cdw_response(url, username, password):
     try:
-        command = [
-            "curl",
-            "-u", f"{username}:{password}",
-            "-H", "Accept: application/xml",
-            "-H", "Content-Type: application/xml",
-            url
-        ]
-
-        result = subprocess.run(
-            command,
-            stdout=subprocess.PIPE,
-            stderr=subprocess.PIPE,
-            text=True,
-            timeout=60
-        )
-
-        xml_data = result.stdout.strip()
+        resp = shared_session(username, password, "basic", XML_HEADERS).get(url, timeout=60)
+        if not resp.ok:
+            return None
+        xml_data = resp.text.strip()
         return xml_data if xml_data else None
 
     except Exception: